@@ -1,3 +1,4 @@
 from .beeclust import BeeClust
+from .ensemble import BeeClustEnsemble
 
-__all__ = ['BeeClust']
\ No newline at end of file
+__all__ = ['BeeClust', 'BeeClustEnsemble']
\ No newline at end of file
@@ -1,18 +1,39 @@
+import json
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
 import numpy as np
 
-from beeclust.heatmap import HeatMap
+from beeclust.cache import HeatMapCache, read_only_view
+from beeclust.heatmap import HeatMap, row_bands
 from beeclust.constants import Constant
+from beeclust.engine import tick_bees, tick_synchronous, wait_time
+from beeclust.rng import RandomPool, join_state, split_state
+from beeclust.schedule import WakeSchedule
+from beeclust.stats import TickStats
+from beeclust.store import BeeStore, MapView, is_bee
+from beeclust.swarms import label_bees, label_array, group_swarms, swarm_stats, SwarmTracker
+from beeclust.tiles import tick_tiled
 
 class BeeClust:
 
+    TICK_ENGINES = ('python', 'vectorized', 'tiled', 'scheduled', 'synchronous')
+    LAYOUTS = ('packed', 'split')
+    # random numbers a tick takes per bee, at most two in the sequential engines
+    TICK_DRAWS = {'vectorized': 3, 'tiled': 3, 'synchronous': 4}
+
     def __init__(self, map, p_changedir=0.2, p_wall=0.8, p_meet=0.8, k_temp=0.9,
-                 k_stay=50, T_ideal=35, T_heater=40, T_cooler=5, T_env=22, min_wait=2):
+                 k_stay=50, T_ideal=35, T_heater=40, T_cooler=5, T_env=22, min_wait=2,
+                 tick_engine='python', heatmap=None, seed=None, cache=None, stats=False,
+                 tile_rows=512, workers=None, layout='packed', wait_dtype='uint16'):
 
         if not isinstance(map, np.ndarray):
             raise TypeError('ERROR map')
         if map.ndim != 2:
             raise ValueError('Value Error, map should be 2dim!')
-        self.map = map
+        self.shape = map.shape
 
         if not (isinstance(p_changedir, float) or isinstance(p_changedir, int)):
             raise TypeError('ERROR p_changedir')
@@ -66,7 +87,203 @@ class BeeClust:
             raise ValueError('Value Error, min_wait cannot be negative!')
         self.min_wait = min_wait
 
+        if tick_engine not in self.TICK_ENGINES:
+            raise ValueError('Value Error, unknown tick engine {}'.format(tick_engine))
+        self.tick_engine = tick_engine
+
+        if not isinstance(tile_rows, int):
+            raise TypeError('ERROR tile_rows')
+        if tile_rows < 2:
+            raise ValueError('Value Error, tiles need at least 2 rows!')
+        self.tile_rows = tile_rows
+        if not (workers is None or isinstance(workers, int)):
+            raise TypeError('ERROR workers')
+        self.workers = workers
+        self._executor = None
+
+        if not (seed is None or isinstance(seed, (int, np.integer, np.random.Generator, np.random.SeedSequence))):
+            raise TypeError('ERROR seed')
+        self._random = RandomPool(seed)
+
+        if not isinstance(stats, bool):
+            raise TypeError('ERROR stats')
+        self.stats = TickStats() if stats else None
+
+        self._check_temperatures(T_heater, T_cooler, T_env)
+
+        if layout not in self.LAYOUTS:
+            raise ValueError('Value Error, unknown layout {}'.format(layout))
+        self.layout = layout
+        try:
+            wait_dtype = np.dtype(wait_dtype)
+        except TypeError:
+            raise TypeError('ERROR wait_dtype')
+        if wait_dtype.kind not in 'iu':
+            raise TypeError('ERROR wait_dtype')
+        self.wait_dtype = wait_dtype.name
+
+        # split layout: static terrain, bees only in the store, map put together on access
+        if layout == 'split':
+            if tick_engine in ('python', 'scheduled'):
+                raise ValueError('Value Error, split layout needs a vectorized tick engine!')
+            if max(k_stay, min_wait) > np.iinfo(wait_dtype).max:
+                raise ValueError('Value Error, wait counter of {} is too narrow for k_stay!'.format(wait_dtype))
+            self.terrain = np.where(is_bee(map), Constant.EMPTY, map).astype(np.int8)
+            grid = self.terrain
+            self._map = None
+        else:
+            self.terrain = None
+            self._map = grid = map
+            # writes through the map property flag the bees for a resync
+            self._map_edited = [False]
+            self._map_view = map.view(MapView)
+            self._map_view.edited = self._map_edited
+
+        if cache is not None and not isinstance(cache, HeatMapCache):
+            raise TypeError('ERROR cache')
+        if cache is not None and heatmap is not None:
+            raise ValueError('Value Error, give either heatmap or cache, not both!')
+
+        if heatmap is None and cache is not None:
+            heatmap = cache.heatmap(grid, T_heater, T_cooler, T_env, k_temp)
+        elif heatmap is None and tick_engine == 'tiled':
+            heatmap = HeatMap(grid, T_heater, T_cooler, T_env, k_temp, engine='tiled',
+                              tile_rows=tile_rows, workers=workers)
+        elif heatmap is None:
+            heatmap = HeatMap(grid, T_heater, T_cooler, T_env, k_temp)
+        elif not isinstance(heatmap, HeatMap):
+            raise TypeError('ERROR heatmap')
+        elif heatmap.heatmap.shape != map.shape:
+            raise ValueError('Value Error, heatmap has to be of map shape!')
+        elif (heatmap.T_heater, heatmap.T_cooler, heatmap.T_env, heatmap.k_temp) != (T_heater, T_cooler, T_env, k_temp):
+            raise ValueError('Value Error, heatmap was computed for other temperatures!')
+        else:
+            # read-only views, edits of this BeeClust copy them on write
+            heatmap = HeatMap.from_arrays(grid, T_heater, T_cooler, T_env, k_temp,
+                                          read_only_view(heatmap.dist_heater),
+                                          read_only_view(heatmap.dist_cooler),
+                                          read_only_view(heatmap.heatmap))
+        self.heatmap_obj = heatmap
+        self._wait_key = None
+        self._score = None
+        self._schedule = None
+        self._store = BeeStore.from_map(map, wait_dtype if self.terrain is not None else np.int64)
+        self._listeners = []
+
+    PARAMS = ('p_changedir', 'p_wall', 'p_meet', 'k_temp', 'k_stay', 'T_ideal',
+              'T_heater', 'T_cooler', 'T_env', 'min_wait', 'tick_engine', 'tile_rows',
+              'layout', 'wait_dtype')
 
+    @property
+    def map(self):
+        """
+        Bees and terrain. Direct writes to it are picked up before bees are
+        next used; in the split layout it is a read-only composed copy.
+        """
+
+        if self.terrain is None:
+            if self._schedule is not None:
+                self._flush_schedule()
+            return self._map_view
+        return self._compose_map()
+
+    @map.setter
+    def map(self, value):
+        # reached by in-place operators like map += 1, other arrays are copied in
+        if self.terrain is not None:
+            raise AttributeError('map of the split layout is read-only')
+        if value is not self._map_view:
+            self._map_view[...] = value
+
+    def _map_dtype(self):
+        """
+        Dtype of map, in the split layout wide enough for every wait counter
+        """
+
+        if self.terrain is None:
+            return self._map.dtype
+        longest = -np.iinfo(self._store.wait_dtype).max
+        return np.result_type(self.terrain, np.min_scalar_type(longest))
+
+    def _compose_map(self):
+        """
+        Read-only map of the split layout
+        """
+
+        map = self.terrain.astype(self._map_dtype())
+        map[self._store.x, self._store.y] = self._store.values
+        map.flags.writeable = False
+        return map
+
+    def _cell_values(self, x, y):
+        """
+        Values of map at cells x, y without putting together the whole map
+        """
+
+        if self.terrain is None:
+            if self._schedule is not None:
+                self._flush_schedule()
+            return self._map[x, y]
+
+        store = self._store
+        values = self.terrain[x, y].astype(self._map_dtype())
+        if len(store) > 0:
+            # bees are in row-major order, so their keys are sorted
+            keys = np.asarray(x) * self.shape[1] + np.asarray(y)
+            key = store.key
+            i = np.minimum(np.searchsorted(key, keys), len(store) - 1)
+            bee = key[i] == keys
+            values[bee] = store.values[i[bee]]
+        return values
+
+    def save(self, path):
+        """
+        Save map, heatmap, parameters and the random state to one .npz file
+        """
+
+        rng_state, rng_buffer = self._random.get_state()
+        rng_state, rng_arrays = split_state(rng_state)
+        params = {name: getattr(self, name) for name in self.PARAMS}
+
+        # written to a temporary file next to path and renamed into place, so
+        # a failed save never leaves a truncated checkpoint behind
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                np.savez(f, map=self.map, heatmap=self.heatmap,
+                         dist_heater=self.heatmap_obj.dist_heater, dist_cooler=self.heatmap_obj.dist_cooler,
+                         params=np.array(json.dumps(params)),
+                         rng_state=np.array(json.dumps(rng_state)), rng_buffer=rng_buffer,
+                         **{'rng_array_' + name: array for name, array in rng_arrays.items()})
+            os.replace(tmp, path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+
+    @classmethod
+    def load(cls, path):
+        """
+        Restore a BeeClust saved by save() without recalculating its heatmap.
+
+        The random state is restored too, so the run continues exactly.
+        """
+
+        with np.load(path, allow_pickle=False) as data:
+            params = json.loads(str(data['params']))
+            heatmap = HeatMap.from_arrays(data['map'], params['T_heater'], params['T_cooler'],
+                                          params['T_env'], params['k_temp'],
+                                          data['dist_heater'], data['dist_cooler'], data['heatmap'])
+            beeclust = cls(heatmap.map, heatmap=heatmap, **params)
+
+            rng_arrays = {name[len('rng_array_'):]: data[name] for name in data.files
+                          if name.startswith('rng_array_')}
+            rng_state = join_state(json.loads(str(data['rng_state'])), rng_arrays)
+            beeclust._random.set_state(rng_state, data['rng_buffer'])
+
+        return beeclust
+
+    @staticmethod
+    def _check_temperatures(T_heater, T_cooler, T_env):
         if (T_heater < T_cooler):
             raise ValueError('Value Error, T_heater is not colder than cooler')
         if (T_heater < T_env):
@@ -74,105 +291,494 @@ class BeeClust:
         if (T_cooler > T_env):
             raise ValueError('Value Error, T_cooler cannot be colder than cooler')
 
-
-        self.heatmap_obj = HeatMap(map, T_heater, T_cooler, T_env, k_temp)
-
     @property
     def heatmap(self):
         return self.heatmap_obj.heatmap
 
+    @property
+    def wait_times(self):
+        """
+        Ticks a bee stopping on each cell waits, rebuilt when heatmap or parameters change
+        """
+
+        key = (self.k_stay, self.T_ideal, self.min_wait, self.heatmap_obj, self.heatmap_obj.version)
+        if self._wait_key != key:
+            self._wait_times = wait_time(self.heatmap, self.k_stay, self.T_ideal, self.min_wait)
+            self._wait_key = key
+        return self._wait_times
+
+    @property
+    def _store(self):
+        # the scheduled engine keeps bees in a WakeSchedule between reads
+        if self._schedule is not None:
+            self._flush_schedule()
+        return self._bee_store
+
+    @_store.setter
+    def _store(self, store):
+        self._bee_store = store
+
     @property
     def bees(self):
-        bees = []
-        for x in range(self.map.shape[0]):
-            for y in range(self.map.shape[1]):
-                if Constant.BEE_UP <= self.map[x, y] <= Constant.BEE_LEFT or self.map[x, y] < 0:
-                    bees.append((x, y))
-        return bees
+        self._check_bees()
+        return list(zip(self._store.x.tolist(), self._store.y.tolist()))
+
+    def sync_bees(self):
+        """
+        Rebuild bee arrays from map, needed only after writing to the array
+        given to the constructor (writes through map are picked up)
+        """
+
+        if self.terrain is None:
+            if self._schedule is not None:
+                self._flush_schedule()
+            self._map_edited[0] = False
+            self._store = BeeStore.from_map(self._map)
+        self._score = None
+        for listener in self._listeners:
+            listener.rebuild()
+
+    def _check_bees(self):
+        """
+        Resync bee arrays if map was written to since they were last used
+        """
+
+        if self.terrain is None and self._map_edited[0]:
+            self.sync_bees()
 
 
     @property
     def swarms(self):
+        self._check_bees()
+        store = self._store
+        labels = label_bees(store.x, store.y, self.shape[1])
+        return group_swarms(store.x, store.y, labels)
 
-        swarms = []
-        bees = self.bees
-        visited, queue = set(), []
+    @property
+    def swarm_stats(self):
+        """
+        Size, centroid, bounding box and mean temperature of each swarm, in the order of swarms
+        """
 
-        for bee in bees:
-            if not bee in visited:
-                queue.append(bee)
-                cluster = []
-                while len(queue) > 0:
-                    cur_bee = queue.pop()
-                    if cur_bee not in cluster:
+        self._check_bees()
+        store = self._store
+        labels = label_bees(store.x, store.y, self.shape[1])
+        return swarm_stats(store.x, store.y, labels, self.heatmap[store.x, store.y])
 
-                        visited.add(cur_bee)
-                        cluster.append(cur_bee)
+    @property
+    def swarm_labels(self):
+        """
+        Array of map shape with swarm numbers starting at 1, 0 where no bee is
+        """
 
-                        for adj_bee in self.adjacent_bees(cur_bee[0], cur_bee[1], bees):
-                            queue.append(adj_bee)
+        self._check_bees()
+        return label_array(self._store.x, self._store.y, self.shape)
 
-                swarms.append(cluster)
+    def track_swarms(self):
+        """
+        Attach a SwarmTracker that keeps swarm labels current after each tick
+        """
 
-        return swarms
+        self._check_bees()
+        return SwarmTracker(self)
 
     @property
     def score(self):
+        """
+        Mean temperature of bees, 0.0 without bees.
 
-        sum_temp = 0
-        bees = self.bees
+        Cached until a tick, forget or an edit moves bees, or heatmap changes.
+        """
 
-        if len(bees) == 0:
-            return 0.0
+        self._check_bees()
+        heatmap_version = (self.heatmap_obj, self.heatmap_obj.version)
+        if self._score is None or self._score[0] != heatmap_version:
+            store = self._store
+            score = float(self.heatmap[store.x, store.y].mean()) if len(store) else 0.0
+            self._score = (heatmap_version, score)
+        return self._score[1]
 
-        for bee in bees:
-            sum_temp += self.heatmap[bee[0], bee[1]]
 
-        return sum_temp/len(bees)
+    def tick(self):
+        """
+        Advance all bees by one tick with tick_engine, returns how many moved
+        """
+
+        self._check_bees()
+        return self._tick_method()()
+
+    def _tick_method(self):
+        return {'vectorized': self._tick_vectorized, 'tiled': self._tick_tiled,
+                'synchronous': self._tick_synchronous,
+                'scheduled': self._tick_scheduled}.get(self.tick_engine, self._tick_sequential)
+
+    def _tick_sequential(self):
+        """
+        Advance bees one by one in the row-major order of map; a bee that
+        moves frees its cell for bees later in the scan
+        """
+
+        stats = self.stats
+        if stats is not None:
+            start = time.perf_counter()
+
+        store = self._store
+        new_x, new_y = store.x.copy(), store.y.copy()
+        bees = enumerate(zip(store.x.tolist(), store.y.tolist()))
+        moved = 0
 
+        if stats is not None:
+            start = stats.lap('scan', start)
 
-    def tick(self):
+        for i, (x, y) in bees:
+            to = self._step_bee(x, y, stats)
+            if to is not None:
+                moved += 1
+                new_x[i], new_y[i] = to
 
-        bees = self.bees
+        if stats is not None:
+            start = stats.lap('decide', start)
 
-        moved = 0
+        old_x, old_y = store.x, store.y
+        store.update(new_x, new_y, self._map[new_x, new_y])
+        self._score = None
+
+        if self._listeners:
+            movers = (new_x != old_x) | (new_y != old_y)
+            self._notify_moved(old_x[movers], old_y[movers], new_x[movers], new_y[movers])
 
-        for bee in bees:
-            x, y = bee[0], bee[1]
-            map_value = self.map[x, y]
-
-            if np.random.rand() < self.p_changedir or map_value == -1:
-                moves = [Constant.BEE_UP, Constant.BEE_DOWN, Constant.BEE_LEFT, Constant.BEE_RIGHT]
-                if map_value in moves:
-                    moves.remove(map_value)
-                bee_direction = np.random.choice(moves)
-                self.map[x, y] = bee_direction
-                if map_value == -1:
-                    continue
-                map_value = bee_direction
-
-            if map_value == Constant.BEE_UP:
-                moved += self.move_bee(bee=bee, to_x=bee[0] - 1, to_y=bee[1])
-            elif map_value == Constant.BEE_DOWN:
-                moved += self.move_bee(bee=bee, to_x=bee[0] + 1, to_y=bee[1])
-            elif map_value == Constant.BEE_RIGHT:
-                moved += self.move_bee(bee=bee, to_x=bee[0], to_y=bee[1] + 1)
-            elif map_value == Constant.BEE_LEFT:
-                moved += self.move_bee(bee=bee, to_x=bee[0], to_y=bee[1] - 1)
-            elif map_value < -1:
-                self.map[x,y] += 1
+        if stats is not None:
+            stats.lap('move', start)
+            stats.ticks += 1
+
+        return moved
+
+    def _step_bee(self, x, y, stats):
+        """
+        Sequential tick of the bee at x, y, returns the cell it moved to or None
+        """
+
+        bee = (x, y)
+        map_value = self._map[x, y]
+
+        if map_value == -1 or (map_value > 0 and self._random.random() < self.p_changedir):
+            if stats is not None and map_value == -1:
+                stats.reorientations += 1
+            elif stats is not None:
+                stats.direction_changes += 1
+            moves = [Constant.BEE_UP, Constant.BEE_DOWN, Constant.BEE_LEFT, Constant.BEE_RIGHT]
+            if map_value in moves:
+                moves.remove(map_value)
+            bee_direction = moves[int(self._random.random() * len(moves))]
+            self._map[x, y] = bee_direction
+            if map_value == -1:
+                return None
+            map_value = bee_direction
+
+        if map_value == Constant.BEE_UP:
+            to_x, to_y = x - 1, y
+        elif map_value == Constant.BEE_DOWN:
+            to_x, to_y = x + 1, y
+        elif map_value == Constant.BEE_RIGHT:
+            to_x, to_y = x, y + 1
+        elif map_value == Constant.BEE_LEFT:
+            to_x, to_y = x, y - 1
+        else:
+            self._map[x,y] += 1
+            if stats is not None:
+                stats.wait_ticks += 1
+            return None
+
+        if self.move_bee(bee=bee, to_x=to_x, to_y=to_y):
+            return to_x, to_y
+        return None
+
+    def _tick_scheduled(self):
+        """
+        Sequential tick that touches only moving bees and bees waking up.
+
+        Waiting bees sit in a WakeSchedule keyed by the tick they reach -1,
+        so their countdown costs nothing per tick. Bees of the tick are the
+        moving ones and the bucket of this tick, in row-major order, which
+        gives the random stream and result of the python engine. Map values
+        of waiting bees and the store are brought up to date only when read
+        (see _flush_schedule), and then the schedule is built anew.
+        """
+
+        stats = self.stats
+        if stats is not None:
+            start = time.perf_counter()
+
+        if self._schedule is None:
+            self._schedule = WakeSchedule.from_store(self._bee_store)
+        schedule = self._schedule
+        schedule.now += 1
+        cols = self.shape[1]
+
+        woken = schedule.wake_up()
+        for key in woken:
+            self._map[key // cols, key % cols] = -1
+        if stats is not None:
+            stats.wait_ticks += schedule.sleeping
+        bees = sorted(schedule.movers.union(woken))
+        moves = []
+
+        if stats is not None:
+            start = stats.lap('scan', start)
+
+        for key in bees:
+            x, y = divmod(key, cols)
+            to = self._step_bee(x, y, stats)
+            if to is not None:
+                schedule.movers.discard(key)
+                schedule.movers.add(to[0] * cols + to[1])
+                moves.append((x, y) + to)
+            elif self._map[x, y] < 0:
+                schedule.sleep(key, -int(self._map[x, y]))
+            else:
+                schedule.movers.add(key)
+
+        if stats is not None:
+            start = stats.lap('decide', start)
+
+        self._score = None
+        if self._listeners and moves:
+            old_x, old_y, new_x, new_y = np.array(moves, dtype=np.intp).T
+            self._notify_moved(old_x, old_y, new_x, new_y)
+
+        if stats is not None:
+            stats.lap('move', start)
+            stats.ticks += 1
+
+        return len(moves)
+
+    def _flush_schedule(self):
+        """
+        Write countdowns of waiting bees to map, rebuild the store and drop the schedule
+        """
+
+        schedule, self._schedule = self._schedule, None
+        cols = self.shape[1]
+        keys, values = schedule.waiting()
+        self._map[keys // cols, keys % cols] = values
+
+        keys = schedule.keys()
+        x, y = keys // cols, keys % cols
+        store = BeeStore(x, y, [], [], cols)
+        store.set_values(self._map[x, y])
+        self._bee_store = store
+
+    def tick_vectorized(self):
+        self._check_bees()
+        return self._tick_vectorized()
+
+    def _tick_vectorized(self):
+        return self._tick_arrays(tick_bees)
+
+    def tick_synchronous(self):
+        """
+        Tick in which all bees move at once, see engine.tick_synchronous.
+
+        Unlike the other engines the result does not depend on the order of
+        bees; bees contending for a cell are settled by a random winner.
+        """
+
+        self._check_bees()
+        return self._tick_synchronous()
+
+    def _tick_synchronous(self):
+        return self._tick_arrays(tick_synchronous)
+
+    def _tick_arrays(self, engine):
+        store = self._store
+        grid = self._map if self.terrain is None else self.terrain
+        x, y, values, movers = engine(grid[np.newaxis], np.zeros(len(store), dtype=np.intp),
+                                      store.x, store.y, store.values, self.wait_times, self._random,
+                                      self.p_changedir, self.p_wall, self.p_meet, self.stats,
+                                      write=self.terrain is None)
+        old_x, old_y = store.x, store.y
+        store.update(x, y, values)
+        self._score = None
+
+        if self._listeners:
+            self._notify_moved(old_x[movers], old_y[movers], x[movers], y[movers])
+        if self.stats is not None:
+            self.stats.ticks += 1
+
+        return int(np.count_nonzero(movers))
+
+    def tick_tiled(self):
+        """
+        Vectorized tick over bands of tile_rows rows advanced on a thread pool.
+
+        Bands are only decoupled at their borders, see tiles.tick_tiled; a map
+        of a single band ticks exactly like tick_vectorized.
+        """
+
+        self._check_bees()
+        return self._tick_tiled()
+
+    def _tick_tiled(self):
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(self.workers)
+
+        store = self._store
+        grid = self._map if self.terrain is None else self.terrain
+        x, y, values, movers = tick_tiled(grid, row_bands(self.shape[0], self.tile_rows),
+                                          store.x, store.y, store.values, self.wait_times, self._random,
+                                          self._executor, self.p_changedir, self.p_wall, self.p_meet,
+                                          self.stats, write=self.terrain is None)
+        old_x, old_y = store.x, store.y
+        store.update(x, y, values)
+        self._score = None
+
+        if self._listeners:
+            self._notify_moved(old_x[movers], old_y[movers], x[movers], y[movers])
+        if self.stats is not None:
+            self.stats.ticks += 1
+
+        return int(np.count_nonzero(movers))
+
+    def close(self):
+        """
+        Shut down the thread pool of the tiled engine, if one was started
+        """
+
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _notify_moved(self, old_x, old_y, new_x, new_y):
+        for listener in self._listeners:
+            listener.moved(old_x, old_y, new_x, new_y)
+
+    def run(self, n_ticks, every=1, observers=()):
+        """
+        Advance n_ticks ticks, same as calling tick() n_ticks times.
+
+        Every `every` ticks each observer is called as
+        observer(beeclust, ticks_done, moved) where moved holds moved bee
+        counts of the ticks since the previous call. An observer returning
+        True stops the run (see ConvergenceMonitor). Returns moved bee counts
+        of all ticks done.
+
+        The engine is resolved once, and the check for direct map edits and
+        the random numbers are done once per observer call for all its ticks.
+        """
+
+        if not isinstance(n_ticks, int):
+            raise TypeError('ERROR n_ticks')
+        if n_ticks < 0:
+            raise ValueError('Value Error, n_ticks cannot be negative!')
+        if not isinstance(every, int):
+            raise TypeError('ERROR every')
+        if every < 1:
+            raise ValueError('Value Error, every has to be positive!')
+
+        tick = self._tick_method()
+        draws = self.TICK_DRAWS.get(self.tick_engine, 2)
+        moved = np.zeros(n_ticks, dtype=int)
+
+        for start in range(0, n_ticks, every):
+            end = min(start + every, n_ticks)
+            # observers may have edited map since the previous ticks
+            self._check_bees()
+            self._random.reserve(draws * len(self._bee_store) * (end - start))
+            for i in range(start, end):
+                moved[i] = tick()
+            stop = False
+            for observer in observers:
+                stop |= bool(observer(self, end, moved[start:end]))
+            if stop:
+                return moved[:end]
 
         return moved
 
     def forget(self):
-        bees = self.bees
-        for bee in bees:
-            self.map[bee[0], bee[1]] = -1
+        self._check_bees()
+        store = self._store
+        store.heading[:] = 0
+        store.wait[:] = 1
+        if self.terrain is None:
+            self._map[store.x, store.y] = -1
+        self._score = None
 
 
     def recalculate_heat(self):
         return self.heatmap_obj.calculate_heatmap()
 
+    def set_temperatures(self, T_heater=None, T_cooler=None, T_env=None, k_temp=None):
+        """
+        Change thermal parameters, reusing the cached heater/cooler distance fields
+        """
+
+        for name, value in (('T_heater', T_heater), ('T_cooler', T_cooler), ('T_env', T_env), ('k_temp', k_temp)):
+            if not (value is None or isinstance(value, float) or isinstance(value, int)):
+                raise TypeError('ERROR {}'.format(name))
+        if k_temp is not None and not (0 < k_temp):
+            raise ValueError('Value Error, coef cannot be negative.')
+
+        T_heater = self.T_heater if T_heater is None else T_heater
+        T_cooler = self.T_cooler if T_cooler is None else T_cooler
+        T_env = self.T_env if T_env is None else T_env
+        k_temp = self.k_temp if k_temp is None else k_temp
+        self._check_temperatures(T_heater, T_cooler, T_env)
+
+        self.T_heater, self.T_cooler, self.T_env, self.k_temp = T_heater, T_cooler, T_env, k_temp
+
+        return self.heatmap_obj.set_temperatures(T_heater, T_cooler, T_env, k_temp)
+
+    def set_cell(self, x, y, value):
+        """
+        Place a bee, wall, heater or cooler on map and keep heatmap current
+        """
+
+        if not isinstance(value, (int, np.integer)):
+            raise TypeError('ERROR cell value')
+        if value > Constant.COOLER:
+            raise ValueError('Value Error, unknown cell value {}'.format(value))
+        if not (0 <= x < self.shape[0] and 0 <= y < self.shape[1]):
+            raise IndexError('Index Error, cell ({}, {}) is outside of map'.format(x, y))
+
+        self._check_bees()
+        i = self._store.index(x, y)
+        if self.terrain is None:
+            old_value = self._map[x, y]
+            self._map[x, y] = value
+        else:
+            old_value = self._store.values[i] if i >= 0 else self.terrain[x, y]
+            self.terrain[x, y] = Constant.EMPTY if is_bee(value) else value
+
+        self._score = None
+        if i >= 0:
+            self._store.remove(i)
+            for listener in self._listeners:
+                listener.removed(x, y)
+        if is_bee(value):
+            self._store.insert(x, y, value)
+            for listener in self._listeners:
+                listener.added(x, y)
+        for listener in self._listeners:
+            listener.edited(x, y)
+
+        obstacles = (Constant.WALL, Constant.HEATER, Constant.COOLER)
+        if old_value != value and (old_value in obstacles or value in obstacles):
+            heatmap_obj = self.heatmap_obj
+            fresh = self._wait_key == (self.k_stay, self.T_ideal, self.min_wait, heatmap_obj, heatmap_obj.version)
+            xs, ys = heatmap_obj.update_cell(x, y, old_value)
+            if fresh:
+                self._wait_times[xs, ys] = wait_time(self.heatmap[xs, ys], self.k_stay, self.T_ideal, self.min_wait)
+                self._wait_key = self._wait_key[:-1] + (heatmap_obj.version,)
+
+    def clear_cell(self, x, y):
+        self.set_cell(x, y, Constant.EMPTY)
+
 
     def adjacent_bees(self, x, y, bees):
         adj_bees = []
@@ -196,43 +802,49 @@ class BeeClust:
 
         is_moving = False
 
-        if new_x < 0 or new_x >= self.map.shape[0] or new_y < 0 or new_y >= self.map.shape[1] or self.map[new_x, new_y] in [Constant.WALL, Constant.COOLER, Constant.HEATER]:
+        if new_x < 0 or new_x >= self._map.shape[0] or new_y < 0 or new_y >= self._map.shape[1] or self._map[new_x, new_y] in [Constant.WALL, Constant.COOLER, Constant.HEATER]:
             self.hit_obstacle(bee)
-        elif self.map[new_x, new_y] < 0 or Constant.BEE_UP <= self.map[new_x, new_y] <= Constant.BEE_LEFT:
+        elif self._map[new_x, new_y] < 0 or Constant.BEE_UP <= self._map[new_x, new_y] <= Constant.BEE_LEFT:
             self.hit_bee(bee)
         else:
             is_moving = True
-            self.map[new_x, new_y] = self.map[x, y]
-            self.map[x, y] = Constant.EMPTY
+            self._map[new_x, new_y] = self._map[x, y]
+            self._map[x, y] = Constant.EMPTY
 
         return is_moving
 
 
     def hit_obstacle(self, bee):
-        if np.random.rand() < self.p_wall:
-            self.map[bee[0], bee[1]] = self.wait(bee)
+        if self.stats is not None:
+            self.stats.wall_hits += 1
+        if self._random.random() < self.p_wall:
+            self._map[bee[0], bee[1]] = self.wait(bee)
+            if self.stats is not None:
+                self.stats.waits += 1
         else:
-            if self.map[bee[0], bee[1]] == Constant.BEE_RIGHT:
+            if self._map[bee[0], bee[1]] == Constant.BEE_RIGHT:
 
-                self.map[bee[0], bee[1]] = Constant.BEE_LEFT
+                self._map[bee[0], bee[1]] = Constant.BEE_LEFT
 
-            elif self.map[bee[0], bee[1]] == Constant.BEE_LEFT:
+            elif self._map[bee[0], bee[1]] == Constant.BEE_LEFT:
 
-                self.map[bee[0], bee[1]] = Constant.BEE_RIGHT
+                self._map[bee[0], bee[1]] = Constant.BEE_RIGHT
 
-            elif self.map[bee[0], bee[1]] == Constant.BEE_UP:
+            elif self._map[bee[0], bee[1]] == Constant.BEE_UP:
 
-                self.map[bee[0], bee[1]] = Constant.BEE_DOWN
+                self._map[bee[0], bee[1]] = Constant.BEE_DOWN
 
-            elif self.map[bee[0], bee[1]] == Constant.BEE_DOWN:
+            elif self._map[bee[0], bee[1]] == Constant.BEE_DOWN:
 
-                self.map[bee[0], bee[1]] = Constant.BEE_UP
+                self._map[bee[0], bee[1]] = Constant.BEE_UP
 
     def hit_bee(self, bee):
-        if np.random.rand() < self.p_meet:
-            self.map[bee[0], bee[1]] = self.wait(bee)
+        if self.stats is not None:
+            self.stats.bee_hits += 1
+        if self._random.random() < self.p_meet:
+            self._map[bee[0], bee[1]] = self.wait(bee)
+            if self.stats is not None:
+                self.stats.waits += 1
 
     def wait(self, bee):
-        T_local = self.heatmap[bee[0], bee[1]]
-
-        return max(int(self.k_stay / (1 + abs(self.T_ideal - T_local))), self.min_wait)*(-1)
+        return -int(self.wait_times[bee[0], bee[1]])
@@ -0,0 +1,216 @@
+import collections
+import hashlib
+import os
+import tempfile
+import threading
+
+import numpy as np
+
+from beeclust.constants import Constant
+from beeclust.heatmap import HeatMap
+
+
+CacheInfo = collections.namedtuple('CacheInfo', ['hits', 'disk_hits', 'misses', 'evictions',
+                                               'entries', 'bytes', 'max_bytes'])
+
+
+def layout_key(map):
+    """
+    Hash of the static layout of map: walls, heaters and coolers, not bees
+    """
+
+    layout = np.where(map >= Constant.WALL, map, Constant.EMPTY).astype(np.int8)
+    digest = hashlib.blake2b(layout.tobytes(), digest_size=16)
+    digest.update(repr(layout.shape).encode('ascii'))
+    return digest.hexdigest()
+
+
+def thermal_key(T_heater, T_cooler, T_env, k_temp):
+    return repr(tuple(float(value) for value in (T_heater, T_cooler, T_env, k_temp)))
+
+
+def read_only(array):
+    array = np.array(array)
+    array.flags.writeable = False
+    return array
+
+
+def read_only_view(array):
+    array = array.view()
+    array.flags.writeable = False
+    return array
+
+
+class DiskStore:
+    """
+    Directory of memory-mappable .npy files shared by processes and runs.
+
+    Files are written to a temporary name and renamed into place, so
+    concurrent writers and readers never see a partial file. Above
+    max_bytes the least recently used files are removed.
+    """
+
+    def __init__(self, directory, max_bytes=2 ** 30):
+        if not isinstance(max_bytes, int):
+            raise TypeError('ERROR max_bytes')
+        if max_bytes < 0:
+            raise ValueError('Value Error, max_bytes cannot be negative!')
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+
+    def path(self, key, name):
+        return os.path.join(self.directory, '{}.{}.npy'.format(key, name))
+
+    def load(self, key, names):
+        arrays = []
+        try:
+            for name in names:
+                path = self.path(key, name)
+                arrays.append(np.load(path, mmap_mode='r'))
+                os.utime(path)
+        except (OSError, ValueError):
+            return None
+        return tuple(arrays)
+
+    def save(self, key, names, arrays):
+        for name, array in zip(names, arrays):
+            fd, tmp = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    np.save(f, array)
+                os.replace(tmp, self.path(key, name))
+            except BaseException:
+                os.unlink(tmp)
+                raise
+        self.evict()
+
+    def evict(self):
+        files = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith('.npy'):
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                files.append((stat.st_mtime, stat.st_size, entry.path))
+
+        total = sum(size for _, size, _ in files)
+        for _, size, path in sorted(files):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.unlink(path)
+            except OSError:
+                pass
+            total -= size
+
+
+class HeatMapCache:
+    """
+    LRU cache of heatmaps shared by BeeClust instances, bounded by bytes.
+
+    Distance fields are cached by layout and heatmaps by layout and thermal
+    parameters, so a new temperature on a known layout is only a re-evaluation.
+    Cached arrays are read-only; an instance that edits its map or
+    temperatures gets its own arrays on the first change.
+
+    With a directory, entries are also kept on disk as .npy files (see
+    DiskStore), so other processes and later runs only memory-map them.
+    """
+
+    FIELDS = ('dist_heater', 'dist_cooler')
+    HEATMAP = ('heatmap',)
+
+    def __init__(self, max_bytes=256 * 2 ** 20, directory=None, max_disk_bytes=2 ** 30):
+        if not isinstance(max_bytes, int):
+            raise TypeError('ERROR max_bytes')
+        if max_bytes < 0:
+            raise ValueError('Value Error, max_bytes cannot be negative!')
+        self.max_bytes = max_bytes
+        self.disk = None if directory is None else DiskStore(directory, max_disk_bytes)
+
+        self._lock = threading.Lock()
+        self.clear()
+
+    def clear(self):
+        with self._lock:
+            self._entries = collections.OrderedDict()
+            self._bytes = 0
+            self.hits = self.disk_hits = self.misses = self.evictions = 0
+
+    def info(self):
+        return CacheInfo(self.hits, self.disk_hits, self.misses, self.evictions,
+                         len(self._entries), self._bytes, self.max_bytes)
+
+    def _get(self, key):
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+        return entry
+
+    def _put(self, key, arrays):
+        if key in self._entries:
+            return
+        size = sum(array.nbytes for array in arrays)
+        if size > self.max_bytes:
+            return
+        self._entries[key] = arrays
+        self._bytes += size
+        while self._bytes > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self._bytes -= sum(array.nbytes for array in evicted)
+            self.evictions += 1
+
+    def heatmap(self, map, T_heater, T_cooler, T_env, k_temp):
+        """
+        HeatMap of map wrapping shared read-only arrays, computed on a miss
+        """
+
+        layout = layout_key(map)
+        thermal = thermal_key(T_heater, T_cooler, T_env, k_temp)
+        key = (layout, thermal)
+        disk_key = '{}-{}'.format(layout, hashlib.blake2b(thermal.encode('ascii'), digest_size=8).hexdigest())
+
+        with self._lock:
+            fields = self._get(layout)
+            heat = self._get(key)
+            if heat is not None:
+                self.hits += 1
+
+        disk_hit = False
+        if self.disk is not None:
+            if fields is None:
+                fields = self.disk.load(layout, self.FIELDS)
+            if heat is None:
+                heat = self.disk.load(disk_key, self.HEATMAP)
+                disk_hit = heat is not None
+
+        computed_fields = computed_heat = False
+        if fields is None:
+            computed = HeatMap(map, T_heater, T_cooler, T_env, k_temp)
+            fields = (read_only(computed.dist_heater), read_only(computed.dist_cooler))
+            computed_fields = True
+            if heat is None:
+                heat = (read_only(computed.heatmap),)
+                computed_heat = True
+        elif heat is None:
+            heat = (read_only(HeatMap.from_arrays(map, T_heater, T_cooler, T_env, k_temp, *fields).heatmap),)
+            computed_heat = True
+
+        if self.disk is not None:
+            if computed_fields:
+                self.disk.save(layout, self.FIELDS, fields)
+            if computed_heat:
+                self.disk.save(disk_key, self.HEATMAP, heat)
+
+        with self._lock:
+            self.disk_hits += disk_hit
+            self.misses += computed_heat
+            self._put(layout, fields)
+            self._put(key, heat)
+
+        return HeatMap.from_arrays(map, T_heater, T_cooler, T_env, k_temp, *fields, heatmap=heat[0])
+
+
+heatmap_cache = HeatMapCache()
@@ -0,0 +1,88 @@
+import collections
+
+import numpy as np
+
+from beeclust.swarms import label_bees
+
+
+class RollingRange:
+    """
+    Minimum and maximum of the last window values, updated in O(1) amortized
+    """
+
+    def __init__(self, window):
+        self.window = window
+        self._count = 0
+        self._min = collections.deque()
+        self._max = collections.deque()
+
+    def __len__(self):
+        return min(self._count, self.window)
+
+    def push(self, value):
+        # deques hold (index, value) of values that may still become the min or max
+        while self._min and self._min[-1][1] >= value:
+            self._min.pop()
+        self._min.append((self._count, value))
+        while self._max and self._max[-1][1] <= value:
+            self._max.pop()
+        self._max.append((self._count, value))
+
+        for queue in (self._min, self._max):
+            if queue[0][0] <= self._count - self.window:
+                queue.popleft()
+        self._count += 1
+
+    @property
+    def spread(self):
+        return self._max[0][1] - self._min[0][1]
+
+
+class ConvergenceMonitor:
+    """
+    Observer of BeeClust.run that stops the run once aggregation has settled.
+
+    Each call records score, the fraction of bees that moved and the number
+    of swarms, labelled afresh so that nothing has to follow every tick in
+    between. The run is converged when, over the last window calls, each of
+    them varies by at most its tolerance; converged_at is then the tick
+    count and the run stops.
+    """
+
+    def __init__(self, window=100, score_tolerance=0.1, moved_tolerance=0.01, swarm_tolerance=0):
+        if not isinstance(window, int):
+            raise TypeError('ERROR window')
+        if window < 1:
+            raise ValueError('Value Error, window has to be positive!')
+        for name, value in (('score_tolerance', score_tolerance), ('moved_tolerance', moved_tolerance),
+                            ('swarm_tolerance', swarm_tolerance)):
+            if not isinstance(value, (int, float)):
+                raise TypeError('ERROR {}'.format(name))
+            if value < 0:
+                raise ValueError('Value Error, {} cannot be negative!'.format(name))
+
+        self.window = window
+        self.tolerances = (score_tolerance, moved_tolerance, swarm_tolerance)
+        self.converged_at = None
+        self._ranges = [RollingRange(window) for _ in self.tolerances]
+
+    @property
+    def converged(self):
+        return self.converged_at is not None
+
+    def __call__(self, beeclust, ticks, moved):
+        beeclust._check_bees()
+        store = beeclust._store
+        bees = len(store)
+        moved_fraction = float(np.sum(moved)) / (len(moved) * bees) if bees and len(moved) else 0.0
+        swarms = int(label_bees(store.x, store.y, beeclust.shape[1]).max()) + 1 if bees else 0
+        values = (beeclust.score, moved_fraction, swarms)
+
+        settled = True
+        for rolling, tolerance, value in zip(self._ranges, self.tolerances, values):
+            rolling.push(value)
+            settled &= len(rolling) == self.window and rolling.spread <= tolerance
+
+        if settled:
+            self.converged_at = ticks
+        return settled
@@ -0,0 +1,221 @@
+import time
+
+import numpy as np
+
+from beeclust.constants import Constant
+
+
+# row/column step of a bee heading, indexed by its map value
+STEP_X = np.array([0, -1, 0, 1, 0])
+STEP_Y = np.array([0, 0, 1, 0, -1])
+
+REVERSE = np.array([0, Constant.BEE_DOWN, Constant.BEE_LEFT, Constant.BEE_UP, Constant.BEE_RIGHT])
+
+# headings offered on a change of direction, in the order tick() lists them
+REORIENT = np.array([Constant.BEE_UP, Constant.BEE_DOWN, Constant.BEE_LEFT, Constant.BEE_RIGHT])
+TURNS = np.array([REORIENT[REORIENT != heading] if heading else REORIENT[:3]
+                  for heading in range(Constant.BEE_LEFT + 1)])
+
+PENDING, MOVED, BLOCKED, OBSTACLE, STAY = range(5)
+
+
+def wait_time(heat, k_stay, T_ideal, min_wait):
+    """
+    Vectorized BeeClust.wait for bees standing on cells with temperature heat,
+    min_wait on walls
+    """
+
+    with np.errstate(invalid='ignore'):
+        return np.maximum((k_stay / (1 + np.abs(T_ideal - heat))).astype(int), min_wait)
+
+
+def choose_headings(value, draw_turn, draw_heading, p_changedir):
+    """
+    Headings of bees after the change of direction at the start of a tick.
+
+    Returns masks of turning and reoriented (-1) bees, the new heading and
+    the map value each bee ends with unless it moves or hits something.
+    """
+
+    turning = (value == -1) | ((value > 0) & (draw_turn < p_changedir))
+    new_heading = TURNS[value.clip(0), (draw_heading * 3).astype(int)]
+    reoriented = value == -1
+    new_heading[reoriented] = REORIENT[(draw_heading[reoriented] * 4).astype(int)]
+
+    heading = np.where(turning, new_heading, value)
+    result = np.where(value < -1, value + 1, heading)
+    return turning, reoriented, heading, result
+
+
+def tick_bees(maps, nn, xx, yy, value, wait_times, random, p_changedir, p_wall, p_meet,
+              stats=None, active=None, write=True):
+    """
+    Advance bees of a stack of maps with shape (n, rows, cols) by one tick.
+
+    Bees are given by replica nn, row xx, column yy and map value, in
+    row-major order of each replica. They are decided with array operations,
+    but the result is the one of the sequential scan of BeeClust.tick: a bee
+    that moves frees its cell for bees later in the scan.
+
+    All randomness of the tick is one block of numbers taken from random,
+    a RandomPool. Updates maps and returns new rows, columns and values of
+    the bees (in the original order) together with a mask of bees that
+    moved. A bee that stops waits the number of ticks wait_times, of map
+    shape, holds for its cell. A TickStats given as stats collects event
+    counts and phase times. Bees outside the active mask only hold their
+    cells and are left as they are. With write=False maps only give the
+    terrain and bees are not written to them.
+    """
+
+    if stats is not None:
+        start = time.perf_counter()
+
+    n, rows, cols = maps.shape
+    count = nn.size
+    if count == 0:
+        return xx, yy, value, np.zeros(0, dtype=bool)
+
+    value = np.asarray(value, dtype=int)
+    if active is not None:
+        held, value = value, np.where(active, value, 0)
+    draw_turn, draw_heading, draw_hit = random.take(3 * count).reshape(3, count)
+    turning, reoriented, heading, result = choose_headings(value, draw_turn, draw_heading, p_changedir)
+
+    moving = value > 0
+    step = np.where(moving, heading, 0)
+    tx, ty = xx + STEP_X[step], yy + STEP_Y[step]
+    inside = (tx >= 0) & (tx < rows) & (ty >= 0) & (ty < cols)
+    target = maps[nn, tx.clip(0, rows - 1), ty.clip(0, cols - 1)]
+    obstacle = ~inside | (target >= Constant.WALL)
+
+    # scan order of a bee is the order of its flat index
+    key = (nn * rows + xx) * cols + yy
+    target_key = (nn * rows + tx) * cols + ty
+    occupant = np.searchsorted(key, target_key).clip(0, count - 1)
+    occupied = key[occupant] == target_key
+    order = np.arange(count)
+
+    if stats is not None:
+        start = stats.lap('scan', start)
+
+    status = np.full(count, STAY)
+    status[moving] = PENDING
+    status[moving & obstacle] = OBSTACLE
+
+    # free target: the first bee of the scan aiming at it takes it
+    free = np.flatnonzero((status == PENDING) & ~occupied)
+    _, first = np.unique(target_key[free], return_index=True)
+    status[free] = BLOCKED
+    status[free[first]] = MOVED
+
+    # target held by a bee later in the scan is still held
+    status[(status == PENDING) & (occupant > order)] = BLOCKED
+
+    # target held by a bee earlier in the scan is free once that bee moved
+    pending = np.flatnonzero(status == PENDING)
+    while pending.size > 0:
+        known = status[occupant[pending]] != PENDING
+        ready = pending[known]
+        vacated = ready[status[occupant[ready]] == MOVED]
+        status[ready] = BLOCKED
+        _, first = np.unique(target_key[vacated], return_index=True)
+        status[vacated[first]] = MOVED
+        pending = pending[~known]
+
+    wall_hit = status == OBSTACLE
+    bee_hit = status == BLOCKED
+    waits = (wall_hit & (draw_hit < p_wall)) | (bee_hit & (draw_hit < p_meet))
+
+    result = np.where(wall_hit, REVERSE[step], result)
+    result[waits] = -wait_times[xx[waits], yy[waits]]
+
+    if stats is not None:
+        stats.count(direction_changes=np.count_nonzero(turning & moving), wall_hits=np.count_nonzero(wall_hit),
+                    bee_hits=np.count_nonzero(bee_hit), waits=np.count_nonzero(waits),
+                    wait_ticks=np.count_nonzero(value < -1), reorientations=np.count_nonzero(reoriented))
+        start = stats.lap('decide', start)
+
+    if active is not None:
+        result = np.where(active, result, held)
+
+    movers = status == MOVED
+    if write:
+        maps[nn, xx, yy] = np.where(movers, Constant.EMPTY, result)
+        maps[nn[movers], tx[movers], ty[movers]] = heading[movers]
+
+    result = np.where(movers, heading, result)
+    if stats is not None:
+        stats.lap('move', start)
+    return np.where(movers, tx, xx), np.where(movers, ty, yy), result, movers
+
+
+def tick_synchronous(maps, nn, xx, yy, value, wait_times, random, p_changedir, p_wall, p_meet,
+                     stats=None, write=True):
+    """
+    Advance bees of a stack of maps by one synchronous tick.
+
+    Takes and returns the same as tick_bees, but all bees decide at once on
+    the state at the start of the tick, so the order of bees does not matter:
+    a bee aiming at a cell held by a bee hits it even if that bee moves away
+    this tick, and of several bees aiming at the same free cell one chosen
+    uniformly at random moves there while the others hit it as a bee. Every
+    step is a whole-array operation without any loop over conflicts.
+    """
+
+    if stats is not None:
+        start = time.perf_counter()
+
+    n, rows, cols = maps.shape
+    count = nn.size
+    if count == 0:
+        return xx, yy, value, np.zeros(0, dtype=bool)
+
+    value = np.asarray(value, dtype=int)
+    draw_turn, draw_heading, draw_hit, priority = random.take(4 * count).reshape(4, count)
+    turning, reoriented, heading, result = choose_headings(value, draw_turn, draw_heading, p_changedir)
+
+    moving = value > 0
+    step = np.where(moving, heading, 0)
+    tx, ty = xx + STEP_X[step], yy + STEP_Y[step]
+    inside = (tx >= 0) & (tx < rows) & (ty >= 0) & (ty < cols)
+    target = maps[nn, tx.clip(0, rows - 1), ty.clip(0, cols - 1)]
+    obstacle = ~inside | (target >= Constant.WALL)
+
+    key = (nn * rows + xx) * cols + yy
+    target_key = (nn * rows + tx) * cols + ty
+    occupant = np.searchsorted(key, target_key).clip(0, count - 1)
+    occupied = key[occupant] == target_key
+
+    if stats is not None:
+        start = stats.lap('scan', start)
+
+    wall_hit = moving & obstacle
+    candidates = np.flatnonzero(moving & ~obstacle & ~occupied)
+
+    # the candidate with the highest priority wins its target
+    order = candidates[np.lexsort((priority[candidates], target_key[candidates]))]
+    claimed = target_key[order]
+    last = np.ones(order.size, dtype=bool)
+    last[:-1] = claimed[1:] != claimed[:-1]
+    movers = np.zeros(count, dtype=bool)
+    movers[order[last]] = True
+    bee_hit = moving & ~obstacle & ~movers
+
+    waits = (wall_hit & (draw_hit < p_wall)) | (bee_hit & (draw_hit < p_meet))
+    result = np.where(wall_hit, REVERSE[step], result)
+    result[waits] = -wait_times[xx[waits], yy[waits]]
+
+    if stats is not None:
+        stats.count(direction_changes=np.count_nonzero(turning & moving), wall_hits=np.count_nonzero(wall_hit),
+                    bee_hits=np.count_nonzero(bee_hit), waits=np.count_nonzero(waits),
+                    wait_ticks=np.count_nonzero(value < -1), reorientations=np.count_nonzero(reoriented))
+        start = stats.lap('decide', start)
+
+    if write:
+        maps[nn, xx, yy] = np.where(movers, Constant.EMPTY, result)
+        maps[nn[movers], tx[movers], ty[movers]] = heading[movers]
+
+    result = np.where(movers, heading, result)
+    if stats is not None:
+        stats.lap('move', start)
+    return np.where(movers, tx, xx), np.where(movers, ty, yy), result, movers
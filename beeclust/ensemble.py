@@ -0,0 +1,98 @@
+import numpy as np
+
+from beeclust.beeclust import BeeClust
+from beeclust.engine import tick_bees
+from beeclust.store import BeeStore
+from beeclust.swarms import label_bees
+
+
+class BeeClustEnsemble:
+    """
+    Independent replicas of one arena, advanced together.
+
+    Replica maps are stored as one (replicas, rows, cols) array and share a
+    single HeatMap. Bees of all replicas live in one BeeStore over the maps
+    stacked into one tall map, so a tick is one call of the vectorized engine.
+    """
+
+    PARAMS = ('p_changedir', 'p_wall', 'p_meet', 'k_temp', 'k_stay', 'T_ideal',
+              'T_heater', 'T_cooler', 'T_env', 'min_wait')
+    # the ensemble always ticks all replicas with the vectorized engine on one packed store
+    UNSUPPORTED = ('tick_engine', 'tile_rows', 'workers', 'layout', 'wait_dtype', 'stats')
+
+    def __init__(self, map, replicas, *args, **kwargs):
+        if not isinstance(replicas, int):
+            raise TypeError('ERROR replicas')
+        if replicas < 1:
+            raise ValueError('Value Error, there has to be at least one replica.')
+        self.replicas = replicas
+        if len(args) > len(self.PARAMS):
+            raise TypeError('ERROR too many positional arguments')
+        for name in self.UNSUPPORTED:
+            if name in kwargs:
+                raise ValueError('Value Error, {} is not supported by BeeClustEnsemble!'.format(name))
+
+        # validates parameters and computes the shared heatmap
+        template = BeeClust(map, *args, **kwargs)
+        for name in self.PARAMS:
+            setattr(self, name, getattr(template, name))
+        self.heatmap_obj = template.heatmap_obj
+        self._random = template._random
+        self._wait_key = None
+
+        self.maps = np.repeat(map[np.newaxis], replicas, axis=0)
+        self._store = BeeStore.from_map(self.maps.reshape(-1, map.shape[1]))
+
+    @property
+    def heatmap(self):
+        return self.heatmap_obj.heatmap
+
+    # the table depends only on heatmap and parameters, kept the same way as in BeeClust
+    wait_times = BeeClust.wait_times
+
+    def _replica_bees(self):
+        rows = self.maps.shape[1]
+        return self._store.x // rows, self._store.x % rows, self._store.y
+
+    def tick(self):
+        """
+        Advance all replicas by one tick, returns moved bees per replica
+        """
+
+        nn, xx, yy = self._replica_bees()
+        x, y, values, movers = tick_bees(self.maps, nn, xx, yy, self._store.values, self.wait_times, self._random,
+                                         self.p_changedir, self.p_wall, self.p_meet)
+        self._store.update(nn * self.maps.shape[1] + x, y, values)
+
+        return np.bincount(nn[movers], minlength=self.replicas)
+
+    @property
+    def score(self):
+        """
+        Mean temperature of bees per replica, 0.0 for a replica without bees
+        """
+
+        nn, xx, yy = self._replica_bees()
+        total = np.bincount(nn, weights=self.heatmap[xx, yy], minlength=self.replicas)
+        count = np.bincount(nn, minlength=self.replicas)
+
+        return np.where(count > 0, total / np.maximum(count, 1), 0.0)
+
+    @property
+    def swarm_counts(self):
+        nn, xx, yy = self._replica_bees()
+        # an empty row between replicas keeps their swarms apart
+        labels = label_bees(nn * (self.maps.shape[1] + 1) + xx, yy, self.maps.shape[2])
+        if labels.size == 0:
+            return np.zeros(self.replicas, dtype=np.intp)
+
+        replica_of_swarm = np.zeros(labels.max() + 1, dtype=np.intp)
+        replica_of_swarm[labels] = nn
+        return np.bincount(replica_of_swarm, minlength=self.replicas)
+
+    def forget(self):
+        store = self._store
+        store.heading[:] = 0
+        store.wait[:] = 1
+        nn, xx, yy = self._replica_bees()
+        self.maps[nn, xx, yy] = -1
@@ -1,5 +1,6 @@
 import numpy as np
 import collections
+from concurrent.futures import ThreadPoolExecutor
 
 from beeclust.constants import Constant
 
@@ -10,46 +11,443 @@ class Vertex(collections.namedtuple("Vertex", ["x", "y", "steps"])):
     def __hash__(self):
         return hash(f'{self.x}:{self.y}')
 
+def neighbour_offsets(width):
+    """
+    Flat index offsets of the 8 neighbours in a padded map of given width
+    """
+    return np.array([-width - 1, -width, -width + 1, -1, 1, width - 1, width, width + 1])
+
+
+def relax_distances(dist, passable, frontier, offsets):
+    """
+    Breadth-first relaxation of flat padded distance array from frontier cells.
+
+    Cells are expanded in order of increasing distance, so frontier may hold
+    seeds with different distances. Only cells whose distance improves are
+    touched. Returns flat indices of all improved cells.
+    """
+
+    frontier = np.unique(frontier)
+    if frontier.size == 0:
+        return frontier
+
+    slot = np.empty(dist.size, dtype=np.intp)
+
+    levels = {}
+    for level in np.unique(dist[frontier]):
+        levels[level] = frontier[dist[frontier] == level]
+
+    improved = []
+    while levels:
+        level = min(levels)
+        cells = levels.pop(level)
+
+        cells = cells[dist[cells] == level]
+        if cells.size == 0:
+            continue
+
+        adj = (cells[:, None] + offsets).ravel()
+        adj = adj[passable[adj]]
+        adj = adj[dist[adj] > level + 1]
+        if adj.size == 0:
+            continue
+
+        # drop duplicates without sorting
+        order = np.arange(adj.size)
+        slot[adj] = order
+        adj = adj[slot[adj] == order]
+
+        dist[adj] = level + 1
+        improved.append(adj)
+        if level + 1 in levels:
+            levels[level + 1] = np.concatenate((levels[level + 1], adj))
+        else:
+            levels[level + 1] = adj
+
+    if not improved:
+        return np.empty(0, dtype=frontier.dtype)
+    # levels only grow, so no cell improves twice and levels are disjoint
+    return np.concatenate(improved)
+
+
+def row_bands(rows, tile_rows):
+    """
+    Split rows into (start, stop) bands of tile_rows rows, none shorter than 2
+    """
+
+    starts = list(range(0, rows, tile_rows))
+    if len(starts) > 1 and rows - starts[-1] < 2:
+        starts.pop()
+    return list(zip(starts, starts[1:] + [rows]))
+
+
+def tiled_distances(map, source, bands, executor=None):
+    """
+    Flat padded distances to source cells of map, relaxed band by band.
+
+    Each band of rows is relaxed on its own, with a halo row on either side
+    holding distances of the neighbouring bands. Halos are exchanged between
+    rounds until nothing improves, which gives the distances of a single
+    relax_distances over the whole map. Bands of a round run on executor.
+    """
+
+    width = map.shape[1] + 2
+    offsets = neighbour_offsets(width)
+
+    # guard row, halo row, band, halo row, guard row
+    fields, passables = [], []
+    for start, stop in bands:
+        local = np.full((stop - start + 4, width), Constant.WALL, dtype=map.dtype)
+        local[2:-2, 1:-1] = map[start:stop]
+        passable = local != Constant.WALL
+        passable[:2] = passable[-2:] = False
+        fields.append(np.where(local == source, 0., np.inf).ravel())
+        passables.append(passable.ravel())
+
+    def relax(i):
+        relax_distances(fields[i], passables[i], frontiers[i], offsets)
+
+    def exchange(halo, row):
+        improved = np.flatnonzero(row < halo)
+        halo[improved] = row[improved]
+        return improved
+
+    frontiers = [np.flatnonzero(field == 0) for field in fields]
+    while any(frontier.size for frontier in frontiers):
+        if executor is None:
+            for i in range(len(bands)):
+                relax(i)
+        else:
+            list(executor.map(relax, range(len(bands))))
+
+        grids = [field.reshape(-1, width) for field in fields]
+        frontiers = []
+        for i, grid in enumerate(grids):
+            frontier = [np.empty(0, dtype=np.intp)]
+            if i > 0:
+                frontier.append(width + exchange(grid[1], grids[i - 1][-3]))
+            if i < len(grids) - 1:
+                frontier.append((grid.shape[0] - 2) * width + exchange(grid[-2], grids[i + 1][2]))
+            frontiers.append(np.concatenate(frontier))
+
+    padded = np.full((map.shape[0] + 2, width), np.inf)
+    for (start, stop), field in zip(bands, fields):
+        padded[start + 1:stop + 1] = field.reshape(-1, width)[2:-2]
+    return padded.ravel()
+
+
 class HeatMap:
 
-    def __init__(self, map, T_heater, T_cooler, T_env, k_temp):
+    ENGINES = ('multisource', 'pairwise', 'tiled')
+    # an edit losing more than this fraction of a field recomputes the field by a full BFS
+    REBUILD_FRACTION = 0.25
+
+    def __init__(self, map, T_heater, T_cooler, T_env, k_temp, engine='multisource', tile_rows=512, workers=None):
         self.map = map
         self.T_heater = T_heater
         self.T_cooler = T_cooler
         self.T_env = T_env
         self.k_temp = k_temp
 
+        if engine not in self.ENGINES:
+            raise ValueError('Value Error, unknown heatmap engine {}'.format(engine))
+        self.engine = engine
+
+        if not isinstance(tile_rows, int):
+            raise TypeError('ERROR tile_rows')
+        if tile_rows < 2:
+            raise ValueError('Value Error, tiles need at least 2 rows!')
+        self.tile_rows = tile_rows
+        self.workers = workers
+
+        # bumped on every change of heatmap, so tables derived from it know when to rebuild
+        self.version = 0
         self.calculate_heatmap()
 
+    @classmethod
+    def from_arrays(cls, map, T_heater, T_cooler, T_env, k_temp, dist_heater, dist_cooler, heatmap=None):
+        """
+        HeatMap of precomputed distance fields (and heatmap) without any BFS.
+
+        Arrays are used as they are, not copied, so they may live in shared memory.
+        """
+
+        for array in (dist_heater, dist_cooler, heatmap):
+            if array is not None and array.shape != map.shape:
+                raise ValueError('Value Error, precomputed arrays have to be of map shape!')
+
+        heatmap_obj = cls.__new__(cls)
+        heatmap_obj.map = map
+        heatmap_obj.T_heater = T_heater
+        heatmap_obj.T_cooler = T_cooler
+        heatmap_obj.T_env = T_env
+        heatmap_obj.k_temp = k_temp
+        heatmap_obj.engine = cls.ENGINES[0]
+        heatmap_obj.tile_rows, heatmap_obj.workers = 512, None
+        heatmap_obj.version = 0
+
+        heatmap_obj.dist_heater = dist_heater
+        heatmap_obj.dist_cooler = dist_cooler
+        heatmap_obj._dist_heater = heatmap_obj._dist_cooler = None
+
+        if heatmap is None:
+            heatmap_obj.evaluate()
+        else:
+            heatmap_obj.heatmap = heatmap
+
+        return heatmap_obj
+
 
     def __getitem__(self, key_tuple):
         return self.heatmap[key_tuple]
 
     def calculate_heatmap(self):
+        if self.engine == 'pairwise':
+            return self.calculate_heatmap_pairwise()
+
+        self.calculate_distances()
+
+        return self.evaluate()
+
+    def evaluate(self):
+        """
+        Re-evaluate heatmap from cached distance fields without any BFS
+        """
+
+        self.heatmap = self.temperature(self.dist_heater, self.dist_cooler, self.map)
+        self.version += 1
+
+        return self.heatmap
+
+    def set_temperatures(self, T_heater=None, T_cooler=None, T_env=None, k_temp=None):
+        if T_heater is not None:
+            self.T_heater = T_heater
+        if T_cooler is not None:
+            self.T_cooler = T_cooler
+        if T_env is not None:
+            self.T_env = T_env
+        if k_temp is not None:
+            self.k_temp = k_temp
+
+        return self.evaluate()
+
+    def temperature(self, dist_heater, dist_cooler, map_values):
+        """
+        Vectorized temperature of cells with given distances and map values
+        """
+
+        with np.errstate(divide='ignore'):
+            heating = (1 / dist_heater) * (self.T_heater - self.T_env)
+            cooling = (1 / dist_cooler) * (self.T_env - self.T_cooler)
+
+        temp = self.T_env + self.k_temp * (np.maximum(heating, 0) - np.maximum(cooling, 0))
+
+        temp = np.where(map_values == Constant.HEATER, self.T_heater, temp)
+        temp = np.where(map_values == Constant.COOLER, self.T_cooler, temp)
+        temp = np.where(map_values == Constant.WALL, np.nan, temp)
+
+        return temp
+
+    def calculate_distances(self):
+        """
+        Perform one multi-source BFS from all heaters and one from all coolers
+        """
+
+        padded = np.pad(self.map, 1, mode='constant', constant_values=Constant.WALL)
+        self._passable = (padded != Constant.WALL).ravel()
+        self._offsets = neighbour_offsets(padded.shape[1])
+
+        if self.engine == 'tiled':
+            bands = row_bands(self.map.shape[0], self.tile_rows)
+            with ThreadPoolExecutor(self.workers) as executor:
+                dist_heater = tiled_distances(self.map, Constant.HEATER, bands, executor)
+                dist_cooler = tiled_distances(self.map, Constant.COOLER, bands, executor)
+            self._store_distances(dist_heater, dist_cooler)
+            return
+
+        dist_heater = np.full(padded.size, np.inf)
+        heaters = np.flatnonzero(padded == Constant.HEATER)
+        dist_heater[heaters] = 0
+        relax_distances(dist_heater, self._passable, heaters, self._offsets)
+
+        dist_cooler = np.full(padded.size, np.inf)
+        coolers = np.flatnonzero(padded == Constant.COOLER)
+        dist_cooler[coolers] = 0
+        relax_distances(dist_cooler, self._passable, coolers, self._offsets)
+
+        self._store_distances(dist_heater, dist_cooler)
+
+    def _store_distances(self, dist_heater, dist_cooler):
+        padded_shape = (self.map.shape[0] + 2, self.map.shape[1] + 2)
+
+        dist_heater[~self._passable] = np.inf
+        dist_cooler[~self._passable] = np.inf
+
+        self._dist_heater = dist_heater
+        self._dist_cooler = dist_cooler
+        self.dist_heater = dist_heater.reshape(padded_shape)[1:-1, 1:-1]
+        self.dist_cooler = dist_cooler.reshape(padded_shape)[1:-1, 1:-1]
+
+    def _pad_distances(self):
+        """
+        Padded copies of distance fields needed by incremental updates
+        """
+
+        padded_shape = (self.map.shape[0] + 2, self.map.shape[1] + 2)
+
+        self._passable = np.pad(self.map != Constant.WALL, 1, mode='constant').ravel()
+        self._offsets = neighbour_offsets(padded_shape[1])
+        self._dist_heater = np.pad(self.dist_heater, 1, mode='constant', constant_values=np.inf).ravel()
+        self._dist_cooler = np.pad(self.dist_cooler, 1, mode='constant', constant_values=np.inf).ravel()
+        self.dist_heater = self._dist_heater.reshape(padded_shape)[1:-1, 1:-1]
+        self.dist_cooler = self._dist_cooler.reshape(padded_shape)[1:-1, 1:-1]
+
+    def update_cell(self, x, y, old_value):
+        """
+        Update distances and heatmap after map[x, y] changed from old_value.
+
+        Only the part of the distance fields the edit affects is recomputed.
+        Returns the (x, y) indices of cells whose temperature was recomputed.
+        """
+
+        if self._dist_heater is None:
+            self._pad_distances()
+
+        new_value = self.map[x, y]
+        width = self.map.shape[1] + 2
+        cell = (x + 1) * width + (y + 1)
+
+        self._passable[cell] = new_value != Constant.WALL
+
+        changed = [np.array([cell])]
+        changed.append(self._update_field(self._dist_heater, cell, Constant.HEATER, old_value, new_value))
+        changed.append(self._update_field(self._dist_cooler, cell, Constant.COOLER, old_value, new_value))
+        changed = np.concatenate(changed)
+        if changed.size > self.map.size // 16:
+            # a mask is cheaper than sorting out duplicates of a large change
+            mask = np.zeros(self._passable.size, dtype=bool)
+            mask[changed] = True
+            changed = np.flatnonzero(mask)
+        else:
+            changed = np.unique(changed)
+
+        xs, ys = changed // width - 1, changed % width - 1
+        if not self.heatmap.flags.writeable:
+            self.heatmap = self.heatmap.copy()
+        self.heatmap[xs, ys] = self.temperature(self.dist_heater[xs, ys], self.dist_cooler[xs, ys],
+                                                self.map[xs, ys])
+        self.version += 1
+
+        return xs, ys
+
+    def _update_field(self, dist, cell, source, old_value, new_value):
+        old_source, new_source = old_value == source, new_value == source
+        old_passable, new_passable = old_value != Constant.WALL, new_value != Constant.WALL
+
+        if new_source and not old_source:
+            dist[cell] = 0
+            return relax_distances(dist, self._passable, np.array([cell]), self._offsets)
+
+        if new_passable and not old_passable:
+            adj = cell + self._offsets
+            dist[cell] = dist[adj[self._passable[adj]]].min(initial=np.inf) + 1
+            if np.isinf(dist[cell]):
+                return np.empty(0, dtype=np.intp)
+            return relax_distances(dist, self._passable, np.array([cell]), self._offsets)
+
+        if (old_source and not new_source) or (old_passable and not new_passable):
+            affected = self._dependent_cells(dist, cell, int(self.REBUILD_FRACTION * self.map.size))
+            if affected is None:
+                return self._rebuild_field(dist, source)
+            dist[affected] = np.inf
+
+            adj = (affected[:, None] + self._offsets).ravel()
+            boundary = adj[self._passable[adj] & np.isfinite(dist[adj])]
+
+            improved = relax_distances(dist, self._passable, boundary, self._offsets)
+            return np.concatenate((affected, improved))
+
+        return np.empty(0, dtype=np.intp)
+
+    def _rebuild_field(self, dist, source):
+        """
+        Full BFS of one padded distance field, returns all passable cells
+        """
+
+        width = self.map.shape[1] + 2
+        xs, ys = np.nonzero(self.map == source)
+        sources = (xs + 1) * width + (ys + 1)
+        dist[:] = np.inf
+        dist[sources] = 0
+        relax_distances(dist, self._passable, sources, self._offsets)
+        return np.flatnonzero(self._passable)
+
+    def _dependent_cells(self, dist, cell, limit):
+        """
+        Cells that lose their distance with cell: every shortest path of
+        theirs leads through cell, so no tight predecessor survives.
+
+        None once there are more than limit of them, a full BFS is then cheaper.
+        """
+
+        lost = np.zeros(dist.size, dtype=bool)
+        lost[cell] = True
+        frontier = np.array([cell])
+        found = [frontier]
+        count = 1
+
+        # the frontier is always a single distance level, so by the time
+        # a level is examined every lost cell of the level above is known
+        while frontier.size > 0:
+            frontier = frontier[np.isfinite(dist[frontier])]
+            adj = (frontier[:, None] + self._offsets).ravel()
+            parent = np.repeat(dist[frontier], self._offsets.size)
+            children = np.unique(adj[self._passable[adj] & (dist[adj] == parent + 1)])
+
+            pred = children[:, None] + self._offsets
+            tight = self._passable[pred] & ~lost[pred] & (dist[pred] == dist[children][:, None] - 1)
+            frontier = children[~tight.any(axis=1)]
+            lost[frontier] = True
+            found.append(frontier)
+            count += frontier.size
+            if count > limit:
+                return None
+
+        return np.concatenate(found)
+
+    def calculate_heatmap_pairwise(self):
 
         heatmap = np.zeros(self.map.shape)
+        dist_heaters = np.full(self.map.shape, np.inf)
+        dist_coolers = np.full(self.map.shape, np.inf)
 
         for x in range(self.map.shape[0]):
             for y in range(self.map.shape[1]):
 
                 map_value = self.map[x, y]
 
+                if map_value == Constant.WALL:
+                    heatmap[x, y] = np.nan
+                    continue
+
+                dist_heater, dist_cooler = self.closest_device(x, y)
+                dist_heaters[x, y], dist_coolers[x, y] = dist_heater, dist_cooler
+
                 if map_value == Constant.HEATER:
                     heatmap[x,y] = self.T_heater
                 elif map_value == Constant.COOLER:
                     heatmap[x, y] = self.T_cooler
-                elif map_value == Constant.WALL:
-                    heatmap[x, y] = np.nan
                 else:
-
-                    dist_heater, dist_cooler = self.closest_device(x, y)
-
                     heating = (1 / dist_heater) * (self.T_heater - self.T_env)
                     cooling = (1 / dist_cooler) * (self.T_env - self.T_cooler)
 
                     heatmap[x, y] = self.T_env + self.k_temp * (max(heating, 0) - max(cooling, 0))
 
+        self.dist_heater = dist_heaters
+        self.dist_cooler = dist_coolers
+        self._pad_distances()
         self.heatmap = heatmap
+        self.version += 1
 
         return heatmap
 
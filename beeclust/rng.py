@@ -0,0 +1,95 @@
+import copy
+
+import numpy as np
+
+
+class RandomPool:
+    """
+    Uniform numbers in [0, 1) drawn from a numpy Generator in blocks.
+
+    A single draw then costs an index into the block instead of a call into
+    the generator, and a batch of n numbers is a slice.
+    """
+
+    # reserve never holds more numbers than this (32 MB)
+    MAX_RESERVE = 1 << 22
+
+    def __init__(self, seed=None, block=4096):
+        self.generator = np.random.default_rng(seed)
+        self.block = block
+        self._buffer = np.empty(0)
+        self._pos = 0
+
+    def _refill(self, n):
+        rest = self._buffer[self._pos:]
+        self._buffer = np.concatenate((rest, self.generator.random(max(self.block, n - rest.size))))
+        self._pos = 0
+
+    def random(self):
+        if self._pos >= self._buffer.size:
+            self._refill(1)
+        value = self._buffer[self._pos]
+        self._pos += 1
+        return value
+
+    def take(self, n):
+        if self._pos + n > self._buffer.size:
+            self._refill(n)
+        values = self._buffer[self._pos:self._pos + n]
+        self._pos += n
+        return values
+
+    def reserve(self, n):
+        """
+        Draw the next n numbers ahead in one call, the numbers stay the same
+        """
+
+        n = min(n, self.MAX_RESERVE)
+        if self._pos + n > self._buffer.size:
+            self._refill(n)
+
+    def get_state(self):
+        """
+        Generator state together with numbers drawn but not used yet
+        """
+
+        return self.generator.bit_generator.state, self._buffer[self._pos:].copy()
+
+    def set_state(self, state, buffer):
+        bit_generator = getattr(np.random, state['bit_generator'])()
+        bit_generator.state = state
+        self.generator = np.random.Generator(bit_generator)
+        self._buffer = np.array(buffer, dtype=float)
+        self._pos = 0
+
+
+def split_state(state, prefix=''):
+    """
+    JSON part of a nested bit generator state and its arrays by dotted path
+    """
+
+    plain, arrays = {}, {}
+    for key, value in state.items():
+        if isinstance(value, dict):
+            plain[key], nested = split_state(value, prefix + key + '.')
+            arrays.update(nested)
+        elif isinstance(value, np.ndarray):
+            arrays[prefix + key] = value
+        else:
+            plain[key] = value
+    return plain, arrays
+
+
+def join_state(plain, arrays):
+    """
+    Bit generator state split by split_state
+    """
+
+    state = copy.deepcopy(plain)
+    for path, value in arrays.items():
+        *parents, key = path.split('.')
+        node = state
+        for parent in parents:
+            node = node.setdefault(parent, {})
+        node[key] = value
+    return state
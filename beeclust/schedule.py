@@ -0,0 +1,66 @@
+import numpy as np
+
+
+class WakeSchedule:
+    """
+    Bees of the scheduled engine: moving bees and a wake-up queue of waiting ones.
+
+    Bees are flat cell keys. A bee that waits w ticks from tick t holds -w
+    in map and wakes, with -1 to reorient, at tick t + w. The queue buckets
+    waiting bees by that tick, so a tick touches only the bees of its bucket
+    and the moving bees. The map value of a waiting bee after tick now is
+    -(wake - now); values() gives them when map has to be brought up to date.
+    """
+
+    def __init__(self, movers, sleepers, wake, now=0):
+        self.now = now
+        self.movers = set(movers.tolist())
+        self._wake = dict(zip(sleepers.tolist(), wake.tolist()))
+        self._buckets = {}
+        for key, tick in self._wake.items():
+            self._buckets.setdefault(tick, []).append(key)
+
+    @classmethod
+    def from_store(cls, store):
+        keys = store.key
+        waiting = store.wait > 0
+        return cls(keys[~waiting], keys[waiting], store.wait[waiting].astype(np.int64))
+
+    def __len__(self):
+        return len(self.movers) + len(self._wake)
+
+    @property
+    def sleeping(self):
+        return len(self._wake)
+
+    def wake_up(self):
+        """
+        Keys of bees waking this tick (now), taken off the queue
+        """
+
+        keys = self._buckets.pop(self.now, [])
+        for key in keys:
+            del self._wake[key]
+        return keys
+
+    def sleep(self, key, ticks):
+        self.movers.discard(key)
+        tick = self.now + ticks
+        self._wake[key] = tick
+        self._buckets.setdefault(tick, []).append(key)
+
+    def keys(self):
+        """
+        Sorted keys of all bees
+        """
+
+        return np.sort(np.fromiter(list(self.movers) + list(self._wake), dtype=np.intp, count=len(self)))
+
+    def waiting(self):
+        """
+        Keys of waiting bees and their map values after tick now
+        """
+
+        keys = np.fromiter(self._wake.keys(), dtype=np.intp, count=len(self._wake))
+        wake = np.fromiter(self._wake.values(), dtype=np.int64, count=len(self._wake))
+        return keys, self.now - wake
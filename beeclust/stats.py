@@ -0,0 +1,56 @@
+import time
+
+
+class TickStats:
+    """
+    Event counters and phase timers accumulated over ticks.
+
+    Counters: direction_changes (spontaneous turns of moving bees), wall_hits,
+    bee_hits, waits (hits that made a bee wait), wait_ticks (countdown steps
+    of waiting bees) and reorientations (bees leaving -1 in a new direction).
+    Timers hold seconds spent in the scan, decide and move phases of a tick.
+    The sequential engines (python, scheduled) move each bee as soon as it
+    is decided, so their decide timer includes the moves and move covers
+    only updating the store and listeners.
+    """
+
+    COUNTERS = ('direction_changes', 'wall_hits', 'bee_hits', 'waits', 'wait_ticks', 'reorientations')
+    PHASES = ('scan', 'decide', 'move')
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.ticks = 0
+        for name in self.COUNTERS:
+            setattr(self, name, 0)
+        self.timers = dict.fromkeys(self.PHASES, 0.0)
+
+    def count(self, **counts):
+        for name, n in counts.items():
+            setattr(self, name, getattr(self, name) + int(n))
+
+    def add(self, other):
+        """
+        Add counters and timers of other, ticks are left alone
+        """
+
+        for name in self.COUNTERS:
+            setattr(self, name, getattr(self, name) + getattr(other, name))
+        for phase in self.PHASES:
+            self.timers[phase] += other.timers[phase]
+
+    def lap(self, phase, start):
+        """
+        Add time since start to phase, returns the current time
+        """
+
+        now = time.perf_counter()
+        self.timers[phase] += now - start
+        return now
+
+    def as_dict(self):
+        stats = {name: getattr(self, name) for name in self.COUNTERS}
+        stats['ticks'] = self.ticks
+        stats['timers'] = dict(self.timers)
+        return stats
@@ -0,0 +1,123 @@
+import numpy as np
+
+from beeclust.constants import Constant
+
+
+def is_bee(values):
+    return (values < 0) | ((values >= Constant.BEE_UP) & (values <= Constant.BEE_LEFT))
+
+
+class MapView(np.ndarray):
+    """
+    Map of a BeeClust that flags writes made through it.
+
+    Item assignment and in-place operations set edited[0], so the BeeClust
+    knows to resync its bees before using them. Views of it flag the same
+    edited; copies and results of operations are plain arrays.
+    """
+
+    def __array_finalize__(self, obj):
+        self.edited = getattr(obj, 'edited', None) if self.base is not None else None
+
+    def _touch(self):
+        edited = getattr(self, 'edited', None)
+        if edited is not None:
+            edited[0] = True
+
+    def __setitem__(self, key, value):
+        super().__setitem__(key, value)
+        self._touch()
+
+    def __array_ufunc__(self, ufunc, method, *inputs, out=None, **kwargs):
+        if method == 'at' and isinstance(inputs[0], MapView):
+            inputs[0]._touch()
+        inputs = tuple(x.view(np.ndarray) if isinstance(x, MapView) else x for x in inputs)
+        if out is not None:
+            for array in out:
+                if isinstance(array, MapView):
+                    array._touch()
+            kwargs['out'] = tuple(x.view(np.ndarray) if isinstance(x, MapView) else x for x in out)
+        result = getattr(ufunc, method)(*inputs, **kwargs)
+        if out is None or method == 'at':
+            return result
+        # in-place operators rebind their target to what is returned here
+        return out[0] if len(out) == 1 else out
+
+
+class BeeStore:
+    """
+    Structure of arrays with row, column, heading and wait counter of bees.
+
+    Bees are kept in the row-major order of map, which is the order tick()
+    visits them in. Heading is 0 for a waiting bee, wait is the countdown
+    stored as -wait in map (0 for a moving bee), of wait_dtype.
+    """
+
+    def __init__(self, x, y, heading, wait, cols, wait_dtype=np.int64):
+        self.cols = cols
+        self.wait_dtype = np.dtype(wait_dtype)
+        self.x = np.asarray(x, dtype=np.intp)
+        self.y = np.asarray(y, dtype=np.intp)
+        self.heading = np.asarray(heading, dtype=np.uint8)
+        self.wait = np.asarray(wait, dtype=self.wait_dtype)
+
+    @classmethod
+    def from_map(cls, map, wait_dtype=np.int64):
+        x, y = np.nonzero(is_bee(map))
+        store = cls(x, y, [], [], map.shape[1], wait_dtype)
+        store.set_values(map[x, y])
+        return store
+
+    def __len__(self):
+        return self.x.size
+
+    @property
+    def key(self):
+        return self.x * self.cols + self.y
+
+    @property
+    def values(self):
+        """
+        Bees encoded the way map holds them
+        """
+
+        return np.where(self.wait > 0, -self.wait.astype(np.int64), self.heading)
+
+    def set_values(self, values):
+        values = np.asarray(values, dtype=np.int64)
+        self.heading = np.where(values > 0, values, 0).astype(np.uint8)
+        self.wait = np.where(values < 0, -values, 0).astype(self.wait_dtype)
+
+    def update(self, x, y, values):
+        """
+        Replace all bees, restoring the row-major order
+        """
+
+        x, y = np.asarray(x, dtype=np.intp), np.asarray(y, dtype=np.intp)
+        order = np.argsort(x * self.cols + y, kind='stable')
+        self.x, self.y = x[order], y[order]
+        self.set_values(np.asarray(values)[order])
+
+    def index(self, x, y):
+        """
+        Position of bee at (x, y) in the store, -1 if there is none
+        """
+
+        key = self.key
+        i = int(np.searchsorted(key, x * self.cols + y))
+        if i < key.size and key[i] == x * self.cols + y:
+            return i
+        return -1
+
+    def insert(self, x, y, value):
+        i = int(np.searchsorted(self.key, x * self.cols + y))
+        self.x = np.insert(self.x, i, x)
+        self.y = np.insert(self.y, i, y)
+        self.heading = np.insert(self.heading, i, value if value > 0 else 0)
+        self.wait = np.insert(self.wait, i, -value if value < 0 else 0)
+
+    def remove(self, i):
+        self.x = np.delete(self.x, i)
+        self.y = np.delete(self.y, i)
+        self.heading = np.delete(self.heading, i)
+        self.wait = np.delete(self.wait, i)
@@ -0,0 +1,285 @@
+import numpy as np
+
+
+def adjacent_pairs(x, y, cols):
+    """
+    Pairs of indices of bees that touch by side, bees given in row-major order
+    """
+
+    key = x * cols + y
+    pairs = []
+
+    for shift, valid in ((1, y + 1 < cols), (cols, np.ones(key.size, dtype=bool))):
+        other = np.searchsorted(key, key + shift).clip(0, max(key.size - 1, 0))
+        found = valid & (key[other] == key + shift)
+        pairs.append((np.flatnonzero(found), other[found]))
+
+    return (np.concatenate([pairs[0][0], pairs[1][0]]),
+            np.concatenate([pairs[0][1], pairs[1][1]]))
+
+
+def label_bees(x, y, cols):
+    """
+    Swarm number of each bee given in row-major order.
+
+    Union-find by hooking roots onto smaller roots and pointer jumping, done
+    as array operations. Swarms are numbered from 0 in order of their first
+    bee, every round at least halves the number of swarms still merging.
+    """
+
+    parent = np.arange(x.size)
+    if x.size == 0:
+        return parent
+
+    u, v = adjacent_pairs(x, y, cols)
+
+    while True:
+        root_u, root_v = parent[u], parent[v]
+        merging = root_u != root_v
+        if not merging.any():
+            break
+
+        root_u, root_v = root_u[merging], root_v[merging]
+        lower = np.minimum(root_u, root_v)
+        np.minimum.at(parent, root_u, lower)
+        np.minimum.at(parent, root_v, lower)
+
+        while True:
+            grandparent = parent[parent]
+            if (grandparent == parent).all():
+                break
+            parent = grandparent
+
+    _, labels = np.unique(parent, return_inverse=True)
+    return labels
+
+
+def label_array(x, y, shape):
+    """
+    Array of map shape with swarm numbers starting at 1, 0 where no bee is
+    """
+
+    labels = np.zeros(shape, dtype=np.intp)
+    labels[x, y] = label_bees(x, y, shape[1]) + 1
+    return labels
+
+
+def group_swarms(x, y, labels):
+    """
+    Lists of (x, y) tuples of bees, one list per swarm
+    """
+
+    order = np.argsort(labels, kind='stable')
+    bounds = np.flatnonzero(np.diff(labels[order])) + 1
+    cells = list(zip(x[order].tolist(), y[order].tolist()))
+
+    swarms = []
+    start = 0
+    for end in bounds.tolist() + [len(cells)]:
+        if end > start:
+            swarms.append(cells[start:end])
+        start = end
+
+    return swarms
+
+
+SWARM_STATS = np.dtype([('size', np.intp), ('centroid_x', float), ('centroid_y', float),
+                        ('min_x', np.intp), ('max_x', np.intp), ('min_y', np.intp), ('max_y', np.intp),
+                        ('mean_temperature', float)])
+
+
+def swarm_stats(x, y, labels, heat):
+    """
+    Structured array of SWARM_STATS, one record per swarm label.
+
+    Bees are given in row-major order with their swarm labels (numbered from
+    0) and heat, the temperature of their cells. Sums come from bincount and
+    bounding boxes from reduceat over bees grouped by label, so it is a few
+    array passes whatever the number of swarms.
+    """
+
+    count = int(labels.max()) + 1 if labels.size else 0
+    stats = np.zeros(count, dtype=SWARM_STATS)
+    if count == 0:
+        return stats
+
+    size = np.bincount(labels, minlength=count)
+    stats['size'] = size
+    stats['centroid_x'] = np.bincount(labels, weights=x, minlength=count) / size
+    stats['centroid_y'] = np.bincount(labels, weights=y, minlength=count) / size
+    stats['mean_temperature'] = np.bincount(labels, weights=heat, minlength=count) / size
+
+    order = np.argsort(labels, kind='stable')
+    starts = np.concatenate(([0], np.cumsum(size)[:-1]))
+    # rows are sorted, so within a swarm the first bee has the lowest row and the last the highest
+    stats['min_x'] = x[order][starts]
+    stats['max_x'] = x[order][starts + size - 1]
+    stats['min_y'] = np.minimum.reduceat(y[order], starts)
+    stats['max_y'] = np.maximum.reduceat(y[order], starts)
+
+    return stats
+
+
+class SwarmTracker:
+    """
+    Keeps swarm labels of a BeeClust current across ticks.
+
+    Only cells that changed are visited: a bee that arrives joins or merges
+    the swarms around it (the smaller swarm is relabelled), a bee that leaves
+    runs searches from its former neighbours that stop as soon as they meet,
+    so a split costs the size of the smaller parts.
+    """
+
+    def __init__(self, beeclust):
+        self.beeclust = beeclust
+        self.rebuild()
+        beeclust._listeners.append(self)
+
+    def detach(self):
+        self.beeclust._listeners.remove(self)
+
+    def rebuild(self):
+        store = self.beeclust._store
+        rows, cols = self.beeclust.shape
+
+        self._width = cols + 2
+        self._offsets = (-self._width, 1, self._width, -1)
+        self._padded = np.zeros((rows + 2, self._width), dtype=np.intp)
+        self._flat = self._padded.ravel()
+        self.labels = self._padded[1:-1, 1:-1]
+        self.labels[store.x, store.y] = label_bees(store.x, store.y, cols) + 1
+
+        counts = np.bincount(self.labels.ravel())
+        self._sizes = {label: int(size) for label, size in enumerate(counts) if label and size}
+        self._next_label = counts.size
+
+    @property
+    def count(self):
+        return len(self._sizes)
+
+    @property
+    def sizes(self):
+        return np.array([self._sizes[label] for label in sorted(self._sizes)], dtype=np.intp)
+
+    def _cell(self, x, y):
+        return (int(x) + 1) * self._width + int(y) + 1
+
+    def moved(self, old_x, old_y, new_x, new_y):
+        for x, y in zip(old_x, old_y):
+            self.removed(x, y)
+        for x, y in zip(new_x, new_y):
+            self.added(x, y)
+
+    def added(self, x, y):
+        cell = self._cell(x, y)
+        flat = self._flat
+
+        around = {flat[cell + offset] for offset in self._offsets} - {0}
+        if not around:
+            label = self._new_label()
+        else:
+            label = max(around, key=lambda other: self._sizes[other])
+            for other in around - {label}:
+                start = next(cell + offset for offset in self._offsets if flat[cell + offset] == other)
+                self._relabel(self._fill(start, other), label)
+                self._sizes[label] += self._sizes.pop(other)
+
+        flat[cell] = label
+        self._sizes[label] = self._sizes.get(label, 0) + 1
+
+    def edited(self, x, y):
+        """
+        Walls and devices do not change swarms, bees come as added/removed
+        """
+
+    def removed(self, x, y):
+        cell = self._cell(x, y)
+        flat = self._flat
+
+        label = flat[cell]
+        flat[cell] = 0
+        self._sizes[label] -= 1
+        if self._sizes[label] == 0:
+            del self._sizes[label]
+            return
+
+        starts = [cell + offset for offset in self._offsets if flat[cell + offset] == label]
+        for part in self._split_parts(starts, label):
+            new_label = self._new_label()
+            self._relabel(part, new_label)
+            self._sizes[new_label] = len(part)
+            self._sizes[label] -= len(part)
+
+    def _new_label(self):
+        self._next_label += 1
+        return self._next_label - 1
+
+    def _relabel(self, cells, label):
+        self._flat[list(cells)] = label
+
+    def _fill(self, start, label):
+        flat = self._flat
+        seen, stack = {start}, [start]
+        while stack:
+            cell = stack.pop()
+            for offset in self._offsets:
+                adj = cell + offset
+                if flat[adj] == label and adj not in seen:
+                    seen.add(adj)
+                    stack.append(adj)
+        return seen
+
+    def _split_parts(self, starts, label):
+        """
+        Searches from starts in lockstep, merging those that meet. Returns
+        cells of each finished search, except the one keeping the label.
+        """
+
+        flat = self._flat
+        group = list(range(len(starts)))
+        owner = {start: i for i, start in enumerate(starts)}
+        seen = [{start} for start in starts]
+        queues = [[start] for start in starts]
+
+        def find(i):
+            while group[i] != i:
+                i = group[i]
+            return i
+
+        parts = []
+        while True:
+            roots = {find(i) for i in range(len(starts))}
+            alive = roots - set(parts)
+            if len(alive) <= 1:
+                break
+            finished = [root for root in alive
+                        if all(not queues[i] for i in range(len(starts)) if find(i) == root)]
+            if finished:
+                parts.append(finished[0])
+                continue
+
+            for i in range(len(starts)):
+                if not queues[i]:
+                    continue
+                cell = queues[i].pop()
+                for offset in self._offsets:
+                    adj = cell + offset
+                    if flat[adj] != label:
+                        continue
+                    if adj in owner:
+                        a, b = find(i), find(owner[adj])
+                        if a != b:
+                            group[max(a, b)] = min(a, b)
+                        continue
+                    owner[adj] = i
+                    seen[i].add(adj)
+                    queues[i].append(adj)
+
+        cells = []
+        for root in parts:
+            part = set()
+            for i in range(len(starts)):
+                if find(i) == root:
+                    part |= seen[i]
+            cells.append(part)
+        return cells
@@ -0,0 +1,129 @@
+import collections
+import itertools
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from beeclust.ensemble import BeeClustEnsemble
+from beeclust.heatmap import HeatMap
+
+
+PARAMS = ('p_changedir', 'p_wall', 'p_meet', 'k_temp', 'k_stay', 'T_ideal',
+          'T_heater', 'T_cooler', 'T_env', 'min_wait')
+THERMAL = ('T_heater', 'T_cooler', 'T_env', 'k_temp')
+DEFAULTS = dict(T_heater=40, T_cooler=5, T_env=22, k_temp=0.9)
+
+
+SweepResult = collections.namedtuple('SweepResult', ['params', 'score', 'swarms', 'moved'])
+
+
+def parameter_grid(grid):
+    """
+    All combinations of parameter values, grid maps names to lists of values
+    """
+
+    for name in grid:
+        if name not in PARAMS:
+            raise ValueError('Value Error, unknown parameter {}'.format(name))
+
+    names = sorted(grid)
+    for values in itertools.product(*(grid[name] for name in names)):
+        yield dict(zip(names, values))
+
+
+class SharedArray:
+    """
+    Array in shared memory that can be pickled to workers by name
+    """
+
+    def __init__(self, array):
+        self.shape, self.dtype = array.shape, array.dtype
+        self.memory = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+        np.ndarray(self.shape, self.dtype, buffer=self.memory.buf)[...] = array
+
+    def spec(self):
+        return self.memory.name, self.shape, self.dtype.str
+
+    def release(self):
+        self.memory.close()
+        self.memory.unlink()
+
+
+def attach(spec):
+    name, shape, dtype = spec
+    memory = shared_memory.SharedMemory(name=name)
+    array = np.ndarray(shape, dtype, buffer=memory.buf)
+    array.flags.writeable = False
+    return memory, array
+
+
+def _simulate(params, map, arrays, ticks, replicas, seed):
+    thermal = {name: params.get(name, DEFAULTS[name]) for name in THERMAL}
+    heatmap = HeatMap.from_arrays(map, dist_heater=arrays[0], dist_cooler=arrays[1],
+                                  heatmap=arrays[2], **thermal)
+
+    ensemble = BeeClustEnsemble(map, replicas, heatmap=heatmap, seed=seed, **params)
+    moved = np.zeros(replicas, dtype=int)
+    for _ in range(ticks):
+        moved += ensemble.tick()
+
+    return SweepResult(params, ensemble.score, ensemble.swarm_counts, moved)
+
+
+def _run(job):
+    index, params, map, fields, ticks, replicas, seed = job
+
+    memories, arrays = [], []
+    for spec in fields:
+        memory, array = attach(spec)
+        memories.append(memory)
+        arrays.append(array)
+
+    result = _simulate(params, map, arrays, ticks, replicas, seed)
+
+    del arrays[:]
+    for memory in memories:
+        memory.close()
+
+    return index, result
+
+
+def sweep(map, grid, ticks, replicas=1, processes=None, seed=None):
+    """
+    Run replicas of map for every combination of parameters in grid.
+
+    Distance fields are computed once, every distinct heatmap once, and both
+    are handed to the worker processes through shared memory. Yields
+    (index in the grid, SweepResult) pairs in the order runs finish. Every
+    combination gets its own random stream spawned from seed.
+    """
+
+    combinations = list(parameter_grid(grid))
+    if not combinations:
+        return
+
+    seeds = np.random.SeedSequence(seed).spawn(len(combinations))
+    base = HeatMap(map, **DEFAULTS)
+    shared = [SharedArray(base.dist_heater), SharedArray(base.dist_cooler)]
+    heatmaps = {}
+
+    try:
+        jobs = []
+        for index, params in enumerate(combinations):
+            thermal = tuple(params.get(name, DEFAULTS[name]) for name in THERMAL)
+            if thermal not in heatmaps:
+                base.set_temperatures(*thermal)
+                heatmaps[thermal] = SharedArray(base.heatmap)
+                shared.append(heatmaps[thermal])
+
+            fields = (shared[0].spec(), shared[1].spec(), heatmaps[thermal].spec())
+            jobs.append((index, params, map, fields, ticks, replicas, seeds[index]))
+
+        with ProcessPoolExecutor(processes) as pool:
+            futures = [pool.submit(_run, job) for job in jobs]
+            for future in as_completed(futures):
+                yield future.result()
+    finally:
+        for array in shared:
+            array.release()
@@ -0,0 +1,73 @@
+import numpy as np
+
+from beeclust.engine import tick_bees
+from beeclust.stats import TickStats
+
+
+class Drawn:
+    """
+    Random numbers drawn in advance, handed to tick_bees in place of a RandomPool
+    """
+
+    def __init__(self, values):
+        self.values = values
+
+    def take(self, n):
+        return self.values[:n]
+
+
+def tick_tiled(map, bands, x, y, value, wait_times, random, executor, p_changedir, p_wall, p_meet,
+               stats=None, write=True):
+    """
+    Advance bees of map by one tick, band of rows by band on executor.
+
+    Bands are (start, stop) row ranges of at least 2 rows. Even bands are
+    advanced first and odd bands second; bands of one phase never touch the
+    same cell, so they run concurrently. Each band is advanced by tick_bees
+    over its rows and a halo row on either side, with bees in the halo (and
+    bees that already moved this tick) only holding their cells. A bee may
+    step into a halo row, and its cell is then taken for the other phase.
+
+    Within a band the result is the one of the sequential row-major scan;
+    across a band border the bee of the even band goes first. Random numbers
+    are taken from random band by band in order, so the result does not
+    depend on the number of workers. Bees are given in row-major order,
+    returns their new rows, columns and values with a mask of movers. With
+    write=False map is only read as terrain, as in tick_bees.
+    """
+
+    rows, cols = map.shape
+    starts = np.array([start for start, _ in bands])
+    band = np.searchsorted(starts, x, side='right') - 1
+
+    new_x, new_y = x.copy(), y.copy()
+    new_value = np.asarray(value, dtype=int).copy()
+    movers = np.zeros(x.size, dtype=bool)
+
+    for phase in (0, 1):
+        order = np.argsort(new_x * cols + new_y, kind='stable')
+        sorted_x = new_x[order]
+
+        jobs = []
+        for k in range(phase, len(bands), 2):
+            start, stop = bands[k]
+            low, high = max(start - 1, 0), min(stop + 1, rows)
+            bees = order[np.searchsorted(sorted_x, low):np.searchsorted(sorted_x, high)]
+            drawn = Drawn(random.take(3 * bees.size).copy())
+            jobs.append((bees, low, high, new_x[bees] - low, new_y[bees], new_value[bees], band[bees] == k, drawn))
+
+        def advance(job):
+            bees, low, high, xx, yy, values, active, drawn = job
+            band_stats = None if stats is None else TickStats()
+            moved = tick_bees(map[np.newaxis, low:high], np.zeros(bees.size, dtype=np.intp), xx, yy, values,
+                              wait_times[low:high], drawn, p_changedir, p_wall, p_meet, band_stats, active, write)
+            return moved, band_stats
+
+        for job, ((bx, by, bvalue, bmoved), band_stats) in zip(jobs, executor.map(advance, jobs)):
+            bees, low = job[:2]
+            new_x[bees], new_y[bees], new_value[bees] = bx + low, by, bvalue
+            movers[bees] |= bmoved
+            if stats is not None:
+                stats.add(band_stats)
+
+    return new_x, new_y, new_value, movers
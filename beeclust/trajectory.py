@@ -0,0 +1,175 @@
+import struct
+
+import numpy as np
+
+
+MAGIC = b'BEECLUST'
+VERSION = 1
+# magic, version, rows, cols, keyframe interval, map dtype
+HEADER = struct.Struct('<8sIIII8s')
+# number of recorded ticks, magic
+FOOTER = struct.Struct('<Q8s')
+COUNT = np.dtype('<u4')
+INDEX = np.dtype('<u4')
+OFFSET = np.dtype('<u8')
+
+
+class TrajectoryWriter:
+    """
+    Records a BeeClust run into a compact binary file.
+
+    Every keyframe_every ticks the whole map is written, the ticks in between
+    hold only the cells the tick changed (flat indices and new values). The
+    initial state is tick 0. An index of record offsets is appended on close.
+    """
+
+    def __init__(self, path, beeclust, keyframe_every=1000):
+        if not isinstance(keyframe_every, int):
+            raise TypeError('ERROR keyframe_every')
+        if keyframe_every < 1:
+            raise ValueError('Value Error, keyframe_every has to be positive!')
+        rows, cols = beeclust.shape
+        if rows * cols >= 2 ** 32:
+            raise ValueError('Value Error, map is too large to be recorded!')
+
+        self.beeclust = beeclust
+        self.keyframe_every = keyframe_every
+        self.dtype = beeclust._map_dtype().newbyteorder('<')
+
+        self._file = open(path, 'wb')
+        self._file.write(HEADER.pack(MAGIC, VERSION, rows, cols, keyframe_every,
+                                     self.dtype.str.encode('ascii')))
+
+        self._offsets = []
+        self._dirty = []
+        self._keyframe()
+        beeclust._listeners.append(self)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    @property
+    def ticks(self):
+        return len(self._offsets)
+
+    def close(self):
+        if self._file.closed:
+            return
+        self.beeclust._listeners.remove(self)
+
+        index_offset = self._file.tell()
+        self._file.write(np.asarray(self._offsets + [index_offset], dtype=OFFSET).tobytes())
+        self._file.write(FOOTER.pack(len(self._offsets), MAGIC))
+        self._file.close()
+
+    def _keyframe(self):
+        self._previous = np.array(self.beeclust.map)
+        self._offsets.append(self._file.tell())
+        self._file.write(self._previous.astype(self.dtype).tobytes())
+        self._dirty = []
+
+    def moved(self, old_x, old_y, new_x, new_y):
+        if self.ticks % self.keyframe_every == 0:
+            self._keyframe()
+            return
+
+        store = self.beeclust._store
+        cols = self.beeclust.shape[1]
+        cells = [old_x * cols + old_y, store.key] + self._dirty
+        cells = np.unique(np.concatenate(cells).astype(np.intp))
+
+        x, y = cells // cols, cells % cols
+        values = self.beeclust._cell_values(x, y)
+        changed = values != self._previous[x, y]
+        x, y, values = x[changed], y[changed], values[changed]
+        self._previous[x, y] = values
+        self._dirty = []
+
+        self._offsets.append(self._file.tell())
+        self._file.write(np.asarray([x.size], dtype=COUNT).tobytes())
+        self._file.write((x * cols + y).astype(INDEX).tobytes())
+        self._file.write(values.astype(self.dtype).tobytes())
+
+    def added(self, x, y):
+        self.edited(x, y)
+
+    def removed(self, x, y):
+        self.edited(x, y)
+
+    def edited(self, x, y):
+        self._dirty.append(np.array([x * self.beeclust.shape[1] + y]))
+
+    def rebuild(self):
+        rows, cols = self.beeclust.shape
+        self._dirty.append(np.arange(rows * cols))
+
+
+class TrajectoryReader:
+    """
+    Memory-mapped view of a recorded run, reader[t] is map after tick t.
+
+    A state is restored from the closest preceding keyframe, so no access
+    replays more than keyframe_every - 1 deltas.
+    """
+
+    def __init__(self, path):
+        self._data = np.memmap(path, dtype=np.uint8, mode='r')
+
+        magic, version, rows, cols, keyframe_every, dtype = HEADER.unpack(bytes(self._data[:HEADER.size]))
+        if magic != MAGIC or version != VERSION:
+            raise ValueError('Value Error, {} is not a BeeClust trajectory!'.format(path))
+        self.shape = (rows, cols)
+        self.keyframe_every = keyframe_every
+        self.dtype = np.dtype(dtype.rstrip(b'\0').decode('ascii'))
+
+        count, magic = FOOTER.unpack(bytes(self._data[-FOOTER.size:]))
+        if magic != MAGIC:
+            raise ValueError('Value Error, trajectory {} was not closed!'.format(path))
+        start = self._data.size - FOOTER.size - (count + 1) * OFFSET.itemsize
+        self._offsets = np.frombuffer(self._data, dtype=OFFSET, count=count + 1, offset=start)
+
+    def __len__(self):
+        return self._offsets.size - 1
+
+    def __getitem__(self, tick):
+        if not isinstance(tick, (int, np.integer)):
+            raise TypeError('ERROR tick')
+        if tick < 0:
+            tick += len(self)
+        if not 0 <= tick < len(self):
+            raise IndexError('Index Error, tick {} was not recorded'.format(tick))
+
+        keyframe = tick - tick % self.keyframe_every
+        state = self.keyframe(keyframe).copy()
+        flat = state.reshape(-1)
+        for t in range(keyframe + 1, tick + 1):
+            cells, values = self.delta(t)
+            flat[cells] = values
+
+        return state
+
+    def keyframe(self, tick):
+        """
+        Read-only map of a keyframe tick, straight from the mapped file
+        """
+
+        size = self.shape[0] * self.shape[1]
+        offset = int(self._offsets[tick])
+        return np.frombuffer(self._data, dtype=self.dtype, count=size, offset=offset).reshape(self.shape)
+
+    def delta(self, tick):
+        """
+        Flat indices and new values of cells changed by a non-keyframe tick
+        """
+
+        offset = int(self._offsets[tick])
+        count = int(np.frombuffer(self._data, dtype=COUNT, count=1, offset=offset)[0])
+        offset += COUNT.itemsize
+        cells = np.frombuffer(self._data, dtype=INDEX, count=count, offset=offset)
+        offset += count * INDEX.itemsize
+        values = np.frombuffer(self._data, dtype=self.dtype, count=count, offset=offset)
+
+        return cells, values
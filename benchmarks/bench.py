@@ -0,0 +1,163 @@
+"""
+Performance benchmarks of BeeClust.
+
+Times tick, heatmap, swarms, bees and score over a matrix of map sizes, bee
+densities and device counts, reports time and peak memory, fits how each
+case scales with map size and compares against a saved baseline.
+
+    python benchmarks/bench.py --save benchmarks/baseline.json
+    python benchmarks/bench.py --compare benchmarks/baseline.json
+"""
+
+import argparse
+import itertools
+import json
+import math
+import os
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+
+from beeclust import BeeClust  # noqa: E402
+from beeclust.heatmap import HeatMap  # noqa: E402
+
+
+def make_map(size, density, devices, seed=0):
+    rng = np.random.RandomState(seed)
+    map = np.zeros((size, size), dtype=np.int8)
+    cells = rng.permutation(map.size)
+
+    walls = map.size // 50
+    map.flat[cells[:walls]] = 5
+    map.flat[cells[walls:walls + devices]] = rng.choice([6, 7], size=devices)
+
+    bees = cells[walls + devices:walls + devices + int(density * map.size)]
+    map.flat[bees] = rng.choice([1, 2, 3, 4, -1, -5], size=bees.size)
+    return map
+
+
+def measure(func, repeat):
+    """
+    Best wall time of repeat calls and peak traced memory of one call
+    """
+
+    best = math.inf
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return best, peak
+
+
+def cases(map, pairwise_max_size):
+    def tick(engine):
+        b = BeeClust(map.copy(), tick_engine=engine, seed=0)
+        return b.tick
+
+    b = BeeClust(map.copy(), seed=0)
+    yield 'tick-python', tick('python')
+    yield 'tick-vectorized', tick('vectorized')
+    yield 'heatmap', lambda: HeatMap(map, 40, 5, 22, .9)
+    if max(map.shape) <= pairwise_max_size:
+        yield 'heatmap-pairwise', lambda: HeatMap(map, 40, 5, 22, .9, engine='pairwise')
+    yield 'swarms', lambda: b.swarms
+    yield 'bees', lambda: b.bees
+    yield 'score', lambda: b.score
+
+    def fresh_score():
+        # drop the cached value so the mean over bees is taken every call
+        b._score = None
+        return b.score
+    yield 'score-fresh', fresh_score
+
+
+def run(sizes, densities, devices, repeat, pairwise_max_size):
+    results = {}
+    for size, density, count in itertools.product(sizes, densities, devices):
+        map = make_map(size, density, count)
+        for case, func in cases(map, pairwise_max_size):
+            seconds, peak = measure(func, repeat)
+            key = '{} size={} density={} devices={}'.format(case, size, density, count)
+            results[key] = {'case': case, 'size': size, 'density': density, 'devices': count,
+                            'seconds': seconds, 'peak_bytes': peak}
+            print('{:<50} {:>10.3f} ms {:>10.1f} KiB'.format(key, seconds * 1e3, peak / 1024))
+    return results
+
+
+def scaling(results):
+    """
+    Exponent of time against number of cells for each case, ~1 is linear
+    """
+
+    exponents = {}
+    for case in sorted({r['case'] for r in results.values()}):
+        points = [(r['size'] ** 2, r['seconds']) for r in results.values()
+                  if r['case'] == case and r['seconds'] > 0]
+        if len({cells for cells, _ in points}) < 2:
+            continue
+        cells, seconds = np.log([p[0] for p in points]), np.log([p[1] for p in points])
+        exponents[case] = float(np.polyfit(cells, seconds, 1)[0])
+    return exponents
+
+
+def compare(results, baseline, threshold):
+    regressions = []
+    for key, result in results.items():
+        if key not in baseline:
+            continue
+        ratio = result['seconds'] / max(baseline[key]['seconds'], 1e-9)
+        if ratio > 1 + threshold:
+            regressions.append((key, ratio))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[8, 16, 32, 64, 128, 256])
+    parser.add_argument('--densities', type=float, nargs='+', default=[0.01, 0.1])
+    parser.add_argument('--devices', type=int, nargs='+', default=[2, 20])
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--pairwise-max-size', type=int, default=16,
+                        help='largest map size to run the quadratic pairwise heatmap on')
+    parser.add_argument('--save', metavar='PATH', help='write results as a baseline')
+    parser.add_argument('--compare', metavar='PATH', help='baseline to check for regressions')
+    parser.add_argument('--threshold', type=float, default=0.25,
+                        help='allowed slowdown against the baseline, 0.25 is 25 %%')
+    args = parser.parse_args(argv)
+
+    results = run(args.sizes, args.densities, args.devices, args.repeat, args.pairwise_max_size)
+
+    print()
+    for case, exponent in scaling(results).items():
+        flag = '  <-- superlinear' if exponent > 1.5 else ''
+        print('{:<20} time ~ cells^{:.2f}{}'.format(case, exponent, flag))
+
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(results, json.load(f), args.threshold)
+        print()
+        for key, ratio in regressions:
+            print('REGRESSION {:<50} {:.2f}x slower'.format(key, ratio))
+        if regressions:
+            return 1
+        print('no regressions above {:.0%}'.format(args.threshold))
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -9,3 +9,16 @@ def zeros8(*args, **kwargs):
 def full8(*args, **kwargs):
     kwargs.setdefault('dtype', numpy.int8)
     return numpy.full(*args, **kwargs)
+
+
+def random_map(shape, seed=0, waiting=True, devices=1):
+    """
+    Seeded map of bees, walls and devices heaters and as many coolers
+    """
+
+    rng = seed if isinstance(seed, numpy.random.RandomState) else numpy.random.RandomState(seed)
+    values = [0, 0, 0, 0, 1, 2, 3, 4, 5] + ([-2, -5] if waiting else [])
+    map = rng.choice(values, size=shape).astype(numpy.int8)
+    cells = rng.choice(map.size, min(2 * devices, map.size), replace=False)
+    map.flat[cells] = ([6, 7] * devices)[:cells.size]
+    return map
@@ -1,4 +1,8 @@
+import math
 from collections import abc
+
+import pytest
+
 from helpers import zeros8
 from beeclust import BeeClust
 
@@ -53,3 +57,29 @@ def test_forget_is_callable():
 def test_recalculate_heat_is_callable():
     b = BeeClust(zeros8((2, 2)))
     b.recalculate_heat()
+
+
+@pytest.mark.parametrize('engine', BeeClust.TICK_ENGINES)
+def test_score_follows_ticks_edits_and_heat(engine):
+    simple_map = zeros8((1, 6))
+    simple_map[0, 0] = 6  # heater
+    simple_map[0, 1] = 2
+    b = BeeClust(simple_map, p_changedir=0, tick_engine=engine)
+    first = b.score
+    assert b.score == first
+
+    b.tick()
+    assert math.isclose(b.score, b.heatmap[0, 2])
+
+    b.set_temperatures(T_heater=60)
+    assert math.isclose(b.score, b.heatmap[0, 2])
+
+    b.set_cell(0, 4, 1)
+    assert math.isclose(b.score, (b.heatmap[0, 2] + b.heatmap[0, 4]) / 2)
+
+    b.set_cell(0, 3, 6)
+    assert math.isclose(b.score, (b.heatmap[0, 2] + b.heatmap[0, 4]) / 2)
+
+    b.clear_cell(0, 2)
+    b.clear_cell(0, 4)
+    assert b.score == 0.0
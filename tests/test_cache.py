@@ -0,0 +1,105 @@
+import numpy
+import pytest
+
+from helpers import zeros8
+from beeclust import BeeClust
+from beeclust.cache import HeatMapCache, layout_key
+from beeclust.heatmap import HeatMap
+
+
+def arena():
+    simple_map = zeros8((6, 8))
+    simple_map[0, 0] = 6
+    simple_map[-1, -1] = 7
+    simple_map[2, 2:6] = 5
+    return simple_map
+
+
+def test_layout_ignores_bees():
+    simple_map = arena()
+    key = layout_key(simple_map)
+    simple_map[3, 3] = -4
+    simple_map[4, 4] = 2
+    assert layout_key(simple_map) == key
+    simple_map[4, 4] = 5
+    assert layout_key(simple_map) != key
+
+
+def test_instances_share_read_only_heatmap():
+    cache = HeatMapCache()
+    a = BeeClust(arena(), cache=cache)
+    simple_map = arena()
+    simple_map[1, 1] = 3
+    b = BeeClust(simple_map, cache=cache)
+    assert cache.info().hits == 1
+    assert cache.info().misses == 1
+    assert b.heatmap is a.heatmap
+    assert not b.heatmap.flags.writeable
+    fresh = HeatMap(arena(), 40, 5, 22, .9)
+    assert numpy.allclose(b.heatmap, fresh.heatmap, equal_nan=True)
+
+    # edits give an instance its own heatmap
+    b.set_cell(3, 3, 6)
+    assert b.heatmap is not a.heatmap
+    assert numpy.allclose(a.heatmap, fresh.heatmap, equal_nan=True)
+    b.set_temperatures(T_heater=50)
+    assert numpy.allclose(a.heatmap, fresh.heatmap, equal_nan=True)
+
+
+def test_new_temperatures_reuse_fields():
+    cache = HeatMapCache()
+    a = BeeClust(arena(), cache=cache)
+    b = BeeClust(arena(), cache=cache, T_heater=60)
+    assert cache.info().misses == 2
+    assert b.heatmap_obj.dist_heater is a.heatmap_obj.dist_heater
+    assert numpy.allclose(b.heatmap, HeatMap(arena(), 60, 5, 22, .9).heatmap, equal_nan=True)
+
+
+def test_eviction_and_clear():
+    one = arena().size * 8 * 3
+    cache = HeatMapCache(max_bytes=one)
+    BeeClust(arena(), cache=cache)
+    BeeClust(arena(), cache=cache, T_env=20)
+    info = cache.info()
+    assert info.bytes <= one
+    assert info.evictions >= 1
+    cache.clear()
+    assert cache.info() == (0, 0, 0, 0, 0, 0, one)
+
+
+def test_cache_validation():
+    with pytest.raises(TypeError):
+        BeeClust(arena(), cache={})
+    with pytest.raises(ValueError):
+        BeeClust(arena(), cache=HeatMapCache(),
+                 heatmap=HeatMap(arena(), 40, 5, 22, .9))
+
+
+def test_disk_cache_across_instances(tmp_path):
+    directory = str(tmp_path / 'heat')
+    first = HeatMapCache(directory=directory)
+    a = BeeClust(arena(), cache=first)
+    assert first.info().misses == 1
+
+    # a new process would start with an empty memory cache
+    second = HeatMapCache(directory=directory)
+    b = BeeClust(arena(), cache=second)
+    assert second.info().disk_hits == 1
+    assert second.info().misses == 0
+    assert isinstance(b.heatmap, numpy.memmap)
+    assert numpy.allclose(b.heatmap, a.heatmap, equal_nan=True)
+
+    c = BeeClust(arena(), cache=HeatMapCache(directory=directory), T_env=10)
+    assert numpy.allclose(c.heatmap, HeatMap(arena(), 40, 5, 10, .9).heatmap,
+                          equal_nan=True)
+
+
+def test_disk_cache_eviction(tmp_path):
+    directory = tmp_path / 'heat'
+    entry = arena().size * 8 + 128
+    cache = HeatMapCache(directory=str(directory), max_disk_bytes=3 * entry)
+    for T_env in range(10, 20):
+        BeeClust(arena(), cache=cache, T_env=T_env)
+    files = list(directory.iterdir())
+    assert sum(f.stat().st_size for f in files) <= 3 * entry
+    assert not [f for f in files if f.suffix == '.tmp']
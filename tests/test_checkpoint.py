@@ -0,0 +1,61 @@
+import numpy
+import pytest
+
+from helpers import random_map
+from beeclust import BeeClust
+from beeclust.heatmap import HeatMap
+
+
+def test_save_and_load_continue_exactly(tmp_path, monkeypatch):
+    path = str(tmp_path / 'checkpoint.npz')
+    simple_map = random_map((10, 12), 8)
+
+    for engine in BeeClust.TICK_ENGINES:
+        b = BeeClust(simple_map.copy(), p_changedir=.3, k_stay=70,
+                     T_heater=45, tick_engine=engine)
+        b.run(5)
+        b.save(path)
+        expected = b.run(20)
+
+        def no_heatmap(self):
+            raise AssertionError('heatmap recalculated')
+        monkeypatch.setattr(HeatMap, 'calculate_heatmap', no_heatmap)
+        restored = BeeClust.load(path)
+        monkeypatch.undo()
+
+        assert restored.tick_engine == engine
+        assert (restored.k_stay, restored.T_heater) == (70, 45)
+        assert (restored.run(20) == expected).all()
+        assert (restored.map == b.map).all()
+        assert numpy.allclose(restored.heatmap, b.heatmap, equal_nan=True)
+
+
+def test_save_other_bit_generators(tmp_path):
+    path = str(tmp_path / 'checkpoint.npz')
+    simple_map = numpy.zeros((6, 6), dtype=numpy.int8)
+    simple_map[0, 0], simple_map[2:4, 2] = 6, 1
+
+    for bit_generator in (numpy.random.MT19937, numpy.random.Philox, numpy.random.SFC64):
+        b = BeeClust(simple_map.copy(), seed=numpy.random.Generator(bit_generator(4)))
+        b.run(3)
+        b.save(path)
+        expected = b.run(10)
+        assert (BeeClust.load(path).run(10) == expected).all()
+
+
+def test_failed_save_keeps_old_checkpoint(tmp_path, monkeypatch):
+    path = str(tmp_path / 'checkpoint.npz')
+    b = BeeClust(numpy.zeros((3, 3), dtype=numpy.int8))
+    b.save(path)
+    with open(path, 'rb') as f:
+        saved = f.read()
+
+    def broken_savez(*args, **kwargs):
+        raise OSError('disk full')
+    monkeypatch.setattr(numpy, 'savez', broken_savez)
+    with pytest.raises(OSError):
+        b.save(path)
+
+    with open(path, 'rb') as f:
+        assert f.read() == saved
+    assert [p.name for p in tmp_path.iterdir()] == ['checkpoint.npz']
@@ -0,0 +1,64 @@
+import numpy
+import pytest
+
+from helpers import zeros8
+from beeclust import BeeClust
+from beeclust.convergence import ConvergenceMonitor, RollingRange
+
+
+def test_rolling_range():
+    rng = numpy.random.RandomState(0)
+    values = rng.randint(0, 20, size=200)
+    rolling = RollingRange(7)
+    for i, value in enumerate(values):
+        rolling.push(value)
+        last = values[max(i - 6, 0):i + 1]
+        assert len(rolling) == len(last)
+        assert rolling.spread == last.max() - last.min()
+
+
+def test_settled_run_stops():
+    simple_map = zeros8((5, 5))
+    simple_map[2, 2] = -100
+    b = BeeClust(simple_map, k_stay=200)
+    monitor = ConvergenceMonitor(window=10)
+    moved = b.run(1000, every=5, observers=[monitor])
+    assert monitor.converged
+    assert monitor.converged_at == 50
+    assert len(moved) == 50
+    assert b._listeners == []
+
+
+def test_swarm_count_follows_bees():
+    simple_map = zeros8((4, 6))
+    simple_map[0, 0] = simple_map[0, 1] = simple_map[3, 5] = -100
+    b = BeeClust(simple_map)
+    monitor = ConvergenceMonitor(window=2, swarm_tolerance=0)
+    monitor(b, 1, [0])
+    b.set_cell(2, 2, -100)
+    assert not monitor(b, 2, [0])
+    assert monitor(b, 3, [0])
+    assert len(b.swarms) == 3
+
+
+def test_moving_run_does_not_stop():
+    simple_map = zeros8((1, 12))
+    simple_map[0, 0] = 6
+    simple_map[0, 1] = 2
+    b = BeeClust(simple_map, p_changedir=0, p_wall=0)
+    monitor = ConvergenceMonitor(window=5, score_tolerance=0.01)
+    moved = b.run(40, observers=[monitor])
+    assert not monitor.converged
+    assert len(moved) == 40
+    assert b._listeners == []
+
+
+def test_monitor_validation():
+    with pytest.raises(TypeError):
+        ConvergenceMonitor(window=1.5)
+    with pytest.raises(ValueError):
+        ConvergenceMonitor(window=0)
+    with pytest.raises(TypeError):
+        ConvergenceMonitor(score_tolerance='0.1')
+    with pytest.raises(ValueError):
+        ConvergenceMonitor(moved_tolerance=-1)
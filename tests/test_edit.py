@@ -0,0 +1,90 @@
+import numpy
+import pytest
+
+from helpers import zeros8
+from beeclust import BeeClust
+from beeclust.heatmap import HeatMap
+
+
+WALL = 5
+HEATER = 6
+COOLER = 7
+
+
+def assert_fresh_heatmap(b):
+    fresh = HeatMap(b.map.copy(), b.T_heater, b.T_cooler, b.T_env, b.k_temp)
+    assert numpy.allclose(b.heatmap, fresh.heatmap, equal_nan=True)
+    assert (b.heatmap_obj.dist_heater == fresh.dist_heater).all()
+    assert (b.heatmap_obj.dist_cooler == fresh.dist_cooler).all()
+
+
+def test_place_and_remove_heater():
+    b = BeeClust(zeros8((5, 6)))
+    b.set_cell(2, 3, HEATER)
+    assert b.map[2, 3] == HEATER
+    assert_fresh_heatmap(b)
+    b.clear_cell(2, 3)
+    assert b.map[2, 3] == 0
+    assert numpy.isclose(b.heatmap, 22).all()
+
+
+def test_wall_splits_heat():
+    simple_map = zeros8((3, 5))
+    simple_map[1, 0] = HEATER
+    simple_map[1, 4] = COOLER
+    b = BeeClust(simple_map)
+    for x in range(3):
+        b.set_cell(x, 2, WALL)
+        assert_fresh_heatmap(b)
+    for x in range(3):
+        b.clear_cell(x, 2)
+        assert_fresh_heatmap(b)
+
+
+def test_random_edits_match_full_rebuild():
+    rng = numpy.random.RandomState(7)
+    for _ in range(20):
+        simple_map = rng.choice([0, 0, 1, -3, WALL, HEATER, COOLER],
+                                size=(6, 7)).astype(numpy.int8)
+        b = BeeClust(simple_map)
+        for _ in range(10):
+            x, y = rng.randint(6), rng.randint(7)
+            b.set_cell(x, y, int(rng.choice([0, 2, -4, WALL, HEATER, COOLER])))
+            assert_fresh_heatmap(b)
+
+
+def test_set_cell_errors():
+    b = BeeClust(zeros8((2, 2)))
+    with pytest.raises(TypeError):
+        b.set_cell(0, 0, 'heater')
+    with pytest.raises(ValueError):
+        b.set_cell(0, 0, 8)
+    with pytest.raises(IndexError):
+        b.set_cell(2, 0, WALL)
+
+
+def test_wall_in_open_space_recomputes_few_cells():
+    simple_map = zeros8((60, 60))
+    simple_map[0, 0] = HEATER
+    simple_map[59, 59] = COOLER
+    heatmap = HeatMap(simple_map, 40, 5, 22, 0.9)
+    simple_map[30, 12] = WALL
+    xs, ys = heatmap.update_cell(30, 12, 0)
+    assert len(xs) < 10
+    fresh = HeatMap(simple_map.copy(), 40, 5, 22, 0.9)
+    assert (heatmap.dist_heater == fresh.dist_heater).all()
+    assert numpy.allclose(heatmap.heatmap, fresh.heatmap, equal_nan=True)
+
+
+def test_removing_only_heater_rebuilds_field():
+    simple_map = zeros8((30, 40))
+    simple_map[3, 5] = HEATER
+    simple_map[20, 30] = COOLER
+    heatmap = HeatMap(simple_map, 40, 5, 22, 0.9)
+    heatmap.update_cell(0, 0, 0)
+    simple_map[3, 5] = 0
+    xs, ys = heatmap.update_cell(3, 5, HEATER)
+    assert len(xs) == simple_map.size
+    fresh = HeatMap(simple_map.copy(), 40, 5, 22, 0.9)
+    assert (heatmap.dist_heater == fresh.dist_heater).all()
+    assert numpy.allclose(heatmap.heatmap, fresh.heatmap, equal_nan=True)
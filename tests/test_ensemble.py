@@ -0,0 +1,67 @@
+import numpy
+import pytest
+
+from helpers import random_map, zeros8
+from beeclust import BeeClust, BeeClustEnsemble
+
+
+def test_replicas_share_heatmap():
+    simple_map = zeros8((3, 4))
+    simple_map[0, 0] = 6
+    e = BeeClustEnsemble(simple_map, 5)
+    assert e.maps.shape == (5, 3, 4)
+    assert (e.maps == simple_map).all()
+    assert e.heatmap.shape == simple_map.shape
+
+
+def test_tick_moves_each_replica():
+    simple_map = zeros8((3, 3))
+    simple_map[1, 1] = 1
+    e = BeeClustEnsemble(simple_map, 4, p_changedir=0)
+    assert list(e.tick()) == [1, 1, 1, 1]
+    assert (e.maps[:, 0, 1] == 1).all()
+    assert numpy.count_nonzero(e.maps) == 4
+
+
+def test_replicas_do_not_touch():
+    # bees on the last and first row of neighbouring replicas
+    simple_map = zeros8((2, 1))
+    simple_map[1, 0] = 3
+    simple_map[0, 0] = -5
+    e = BeeClustEnsemble(simple_map, 3, p_changedir=0, p_wall=0)
+    assert list(e.swarm_counts) == [1, 1, 1]
+    assert list(e.tick()) == [0, 0, 0]
+    assert (e.maps[:, 1, 0] == 1).all()
+
+
+def test_matches_single_runs():
+    simple_map = random_map((6, 7), 4, waiting=False)
+    kwargs = dict(p_changedir=0, p_wall=0, p_meet=0)
+    e = BeeClustEnsemble(simple_map, 3, **kwargs)
+    b = BeeClust(simple_map.copy(), **kwargs)
+    for _ in range(10):
+        assert list(e.tick()) == [b.tick()] * 3
+        assert (e.maps == b.map).all()
+        assert numpy.allclose(e.score, b.score)
+        assert list(e.swarm_counts) == [len(b.swarms)] * 3
+
+
+def test_empty_replicas():
+    e = BeeClustEnsemble(zeros8((3, 4)), 2)
+    assert list(e.tick()) == [0, 0]
+    assert list(e.score) == [0.0, 0.0]
+    assert list(e.swarm_counts) == [0, 0]
+
+
+def test_replicas_validation():
+    with pytest.raises(TypeError):
+        BeeClustEnsemble(zeros8((2, 2)), 2.5)
+    with pytest.raises(ValueError):
+        BeeClustEnsemble(zeros8((2, 2)), 0)
+    with pytest.raises(ValueError):
+        BeeClustEnsemble(zeros8((2, 2)), 2, p_wall=2)
+    for name, value in (('tick_engine', 'tiled'), ('layout', 'split'), ('stats', True), ('workers', 2)):
+        with pytest.raises(ValueError):
+            BeeClustEnsemble(zeros8((2, 2)), 2, **{name: value})
+    with pytest.raises(TypeError):
+        BeeClustEnsemble(zeros8((2, 2)), 2, 0.2, 0.8, 0.8, 0.9, 50, 35, 40, 5, 22, 2, 'vectorized')
@@ -1,8 +1,10 @@
 import math
 import numpy
+import pytest
 
 from helpers import full8, zeros8
-from beeclust import BeeClust
+from beeclust import BeeClust, BeeClustEnsemble
+from beeclust.heatmap import HeatMap
 
 
 # Expected defaults
@@ -188,3 +190,62 @@ def test_score_changes():
     score = b.score
     b.tick()
     assert b.score < score
+
+
+def test_multisource_matches_pairwise():
+    rng = numpy.random.RandomState(42)
+    for _ in range(50):
+        shape = rng.randint(1, 10, size=2)
+        simple_map = rng.choice([0, 0, 0, 1, -2, WALL, HEATER, COOLER],
+                                size=shape).astype(numpy.int8)
+        fast = HeatMap(simple_map, T_HEATER, T_COOLER, T_ENV, .9)
+        slow = HeatMap(simple_map, T_HEATER, T_COOLER, T_ENV, .9,
+                       engine='pairwise')
+        assert numpy.allclose(fast.heatmap, slow.heatmap, equal_nan=True)
+
+
+def test_set_temperatures_reuses_distances():
+    simple_map = zeros8((4, 4))
+    simple_map[0, -1] = HEATER
+    simple_map[-1, 0] = COOLER
+    b = BeeClust(simple_map)
+    dist_heater = b.heatmap_obj.dist_heater
+    b.set_temperatures(T_cooler=-20, T_env=0, T_heater=20, k_temp=.8)
+    assert b.heatmap_obj.dist_heater is dist_heater
+    assert math.isclose(b.heatmap[1, -2], 8)
+    assert math.isclose(b.heatmap[-2, 1], -8)
+    assert math.isclose(b.heatmap[0, -1], 20)
+    assert (b.T_heater, b.T_cooler, b.T_env, b.k_temp) == (20, -20, 0, .8)
+
+
+def test_set_temperatures_validates():
+    b = BeeClust(zeros8((2, 2)))
+    with pytest.raises(ValueError):
+        b.set_temperatures(T_heater=10)
+    with pytest.raises(ValueError):
+        b.set_temperatures(k_temp=-1)
+    with pytest.raises(TypeError):
+        b.set_temperatures(T_env='hot')
+    assert numpy.isclose(b.heatmap, T_ENV).all()
+
+
+def test_precomputed_heatmap():
+    simple_map = zeros8((3, 3))
+    simple_map[1, 1] = HEATER
+    fresh = HeatMap(simple_map, T_HEATER, T_COOLER, T_ENV, .9)
+    shared = HeatMap.from_arrays(simple_map, T_HEATER, T_COOLER, T_ENV, .9,
+                                 fresh.dist_heater, fresh.dist_cooler)
+    b = BeeClust(simple_map, heatmap=shared)
+    assert b.heatmap_obj is not shared
+    assert numpy.shares_memory(b.heatmap, shared.heatmap)
+    assert numpy.shares_memory(b.heatmap_obj.dist_heater, shared.dist_heater)
+    assert numpy.shares_memory(BeeClustEnsemble(simple_map, 3, heatmap=shared).heatmap, shared.heatmap)
+    assert numpy.allclose(b.heatmap, fresh.heatmap)
+    b.set_cell(0, 0, WALL)
+    assert numpy.isnan(b.heatmap[0, 0])
+    assert numpy.allclose(shared.heatmap, fresh.heatmap)
+    assert numpy.isfinite(shared.dist_heater).all()
+    with pytest.raises(ValueError):
+        BeeClust(simple_map, T_heater=50, heatmap=shared)
+    with pytest.raises(TypeError):
+        BeeClust(simple_map, heatmap=fresh.heatmap)
@@ -0,0 +1,85 @@
+import numpy
+import pytest
+
+from helpers import random_map, zeros8
+from beeclust import BeeClust
+from beeclust.trajectory import TrajectoryReader, TrajectoryWriter
+
+
+@pytest.mark.parametrize('engine', ['vectorized', 'tiled'])
+def test_split_same_as_packed(engine):
+    simple_map = random_map((16, 16), 0)
+    packed = BeeClust(simple_map.copy(), tick_engine=engine, tile_rows=4, seed=3)
+    split = BeeClust(simple_map.copy(), tick_engine=engine, tile_rows=4, seed=3, layout='split')
+    assert list(packed.run(15)) == list(split.run(15))
+    assert numpy.array_equal(packed.map, split.map)
+    assert split.terrain.dtype == numpy.int8
+    assert numpy.count_nonzero(split.terrain < 0) == 0
+
+
+def test_split_large_k_stay():
+    simple_map = zeros8((1, 3))
+    simple_map[0, 2] = 2
+    b = BeeClust(simple_map, p_wall=1, p_changedir=0, k_stay=1000, T_ideal=22, min_wait=0,
+                 tick_engine='vectorized', layout='split')
+    b.tick()
+    assert b.map[0, 2] == -1000
+    b.tick()
+    assert b.map[0, 2] == -999
+    assert b.map.dtype == numpy.int32
+
+
+def test_split_map_is_read_only():
+    b = BeeClust(zeros8((3, 3)), tick_engine='vectorized', layout='split')
+    with pytest.raises(ValueError):
+        b.map[0, 0] = 5
+
+
+def test_split_trajectory_reads_only_changed_cells(tmp_path, monkeypatch):
+    b = BeeClust(random_map((12, 12), 4), tick_engine='vectorized', layout='split', seed=2)
+    rows, cols = numpy.nonzero(numpy.ones(b.shape, dtype=bool))
+    assert (b._cell_values(rows, cols) == b.map[rows, cols]).all()
+
+    with TrajectoryWriter(str(tmp_path / 'run.bct'), b) as writer:
+        composed = []
+        monkeypatch.setattr(BeeClust, '_compose_map', lambda self: composed.append(1))
+        b.run(10)
+        monkeypatch.undo()
+    assert composed == []
+    assert (TrajectoryReader(str(tmp_path / 'run.bct'))[writer.ticks - 1] == b.map).all()
+
+
+def test_split_set_cell_and_forget():
+    b = BeeClust(zeros8((3, 3)), tick_engine='vectorized', layout='split')
+    b.set_cell(1, 1, 5)
+    b.set_cell(0, 0, 2)
+    assert b.terrain[1, 1] == 5 and b.terrain[0, 0] == 0
+    assert b.map[0, 0] == 2 and b.map[1, 1] == 5
+    assert numpy.isnan(b.heatmap[1, 1])
+    b.forget()
+    assert b.map[0, 0] == -1
+    b.clear_cell(0, 0)
+    assert b.bees == []
+
+
+def test_split_checkpoint(tmp_path):
+    b = BeeClust(random_map((8, 8), 1), k_stay=300, tick_engine='vectorized', layout='split',
+                 wait_dtype='uint32', seed=2)
+    b.run(5)
+    b.save(str(tmp_path / 'split.npz'))
+    restored = BeeClust.load(str(tmp_path / 'split.npz'))
+    assert restored.layout == 'split' and restored.wait_dtype == 'uint32'
+    b.run(5)
+    restored.run(5)
+    assert numpy.array_equal(b.map, restored.map)
+
+
+def test_split_validation():
+    with pytest.raises(ValueError):
+        BeeClust(zeros8((2, 2)), layout='split')
+    with pytest.raises(ValueError):
+        BeeClust(zeros8((2, 2)), tick_engine='vectorized', layout='mixed')
+    with pytest.raises(ValueError):
+        BeeClust(zeros8((2, 2)), tick_engine='vectorized', layout='split', k_stay=300, wait_dtype='uint8')
+    with pytest.raises(TypeError):
+        BeeClust(zeros8((2, 2)), tick_engine='vectorized', layout='split', wait_dtype='float32')
@@ -0,0 +1,51 @@
+import numpy
+import pytest
+
+from helpers import random_map, zeros8
+from beeclust import BeeClust
+
+
+def test_run_same_as_ticks():
+    simple_map = numpy.array([[2, 0, 0, 0, 0, 0, 0, 0, 0, 0]])
+    b = BeeClust(simple_map, p_changedir=0, p_wall=1)
+    moved = b.run(12)
+    assert list(moved) == [1] * 9 + [0] * 3
+    assert b.map[0, -1] != 0
+
+
+def test_run_calls_observers_every_k_ticks():
+    calls = []
+
+    def observer(beeclust, ticks, moved):
+        calls.append((ticks, list(moved), beeclust.score))
+
+    simple_map = zeros8((1, 12))
+    simple_map[0, 0] = 2
+    for engine in BeeClust.TICK_ENGINES:
+        del calls[:]
+        b = BeeClust(simple_map.copy(), p_changedir=0, tick_engine=engine)
+        b.run(10, every=4, observers=[observer])
+        assert [ticks for ticks, _, _ in calls] == [4, 8, 10]
+        assert [moved for _, moved, _ in calls] == [[1] * 4, [1] * 4, [1] * 2]
+        assert b.map[0, 10] == 2
+
+
+def test_run_validation():
+    b = BeeClust(zeros8((2, 2)))
+    assert len(b.run(0)) == 0
+    with pytest.raises(TypeError):
+        b.run(1.5)
+    with pytest.raises(ValueError):
+        b.run(-1)
+    with pytest.raises(ValueError):
+        b.run(5, every=0)
+
+
+def test_run_matches_ticks_for_all_engines():
+    simple_map = random_map((12, 14), 3)
+    for engine in BeeClust.TICK_ENGINES:
+        ran = BeeClust(simple_map.copy(), tick_engine=engine, seed=5)
+        ticked = BeeClust(simple_map.copy(), tick_engine=engine, seed=5)
+        moved = ran.run(25, every=7)
+        assert list(moved) == [ticked.tick() for _ in range(25)]
+        assert (ran.map == ticked.map).all()
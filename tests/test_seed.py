@@ -0,0 +1,52 @@
+import numpy
+import pytest
+
+from helpers import random_map, zeros8
+from beeclust import BeeClust, BeeClustEnsemble
+from beeclust.rng import RandomPool
+from beeclust.sweep import sweep
+
+
+def test_seeded_runs_repeat():
+    for engine in BeeClust.TICK_ENGINES:
+        first = BeeClust(random_map((12, 12), 11), seed=5, tick_engine=engine)
+        moved = first.run(30)
+        # other instances and the global state do not interfere
+        BeeClust(random_map((12, 12), 11), seed=5, tick_engine=engine).run(7)
+        numpy.random.rand(100)
+        second = BeeClust(random_map((12, 12), 11), seed=5, tick_engine=engine)
+        assert (second.run(30) == moved).all()
+        assert (second.map == first.map).all()
+
+
+def test_generator_accepted():
+    a = BeeClust(random_map((12, 12), 11), seed=numpy.random.default_rng(3))
+    b = BeeClust(random_map((12, 12), 11), seed=numpy.random.default_rng(3))
+    assert (a.run(10) == b.run(10)).all()
+    with pytest.raises(TypeError):
+        BeeClust(zeros8((2, 2)), seed='lucky')
+
+
+def test_seeded_ensemble_and_sweep():
+    a = BeeClustEnsemble(random_map((12, 12), 11), 4, seed=9)
+    b = BeeClustEnsemble(random_map((12, 12), 11), 4, seed=9)
+    for _ in range(10):
+        assert (a.tick() == b.tick()).all()
+    grid = {'p_changedir': [.2, .6]}
+    first = dict(sweep(random_map((12, 12), 11), grid, 10, replicas=2, processes=2, seed=1))
+    second = dict(sweep(random_map((12, 12), 11), grid, 10, replicas=2, processes=2, seed=1))
+    for index in first:
+        assert (first[index].moved == second[index].moved).all()
+
+
+def test_pool_blocks():
+    pool = RandomPool(0, block=8)
+    expected = numpy.random.default_rng(0).random(30)
+    drawn = [pool.random() for _ in range(5)]
+    pool.reserve(17)
+    drawn += list(pool.take(20)) + [pool.random()]
+    assert numpy.allclose(drawn, expected[:26])
+    state, buffer = pool.get_state()
+    other = RandomPool()
+    other.set_state(state, buffer)
+    assert numpy.allclose(other.take(4), expected[26:30])
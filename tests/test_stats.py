@@ -0,0 +1,62 @@
+import pytest
+
+from helpers import random_map, zeros8
+from beeclust import BeeClust
+from beeclust.stats import TickStats
+
+
+def test_stats_off_by_default():
+    b = BeeClust(zeros8((2, 2)))
+    assert b.stats is None
+    b.tick()
+    with pytest.raises(TypeError):
+        BeeClust(zeros8((2, 2)), stats=1)
+
+
+@pytest.mark.parametrize('engine', BeeClust.TICK_ENGINES)
+def test_stats_wall_hit_and_wait(engine):
+    simple_map = zeros8((1, 3))
+    simple_map[0, 2] = 2
+    b = BeeClust(simple_map, p_changedir=0, p_wall=1, k_stay=4, T_ideal=22, min_wait=0,
+                 stats=True, tick_engine=engine)
+    b.tick()
+    assert b.map[0, 2] == -4
+    for _ in range(3):
+        b.tick()
+    assert b.map[0, 2] == -1
+    b.tick()
+
+    stats = b.stats
+    assert (stats.ticks, stats.wall_hits, stats.waits, stats.wait_ticks, stats.reorientations) == (5, 1, 1, 3, 1)
+    assert (stats.bee_hits, stats.direction_changes) == (0, 0)
+    assert set(stats.timers) == set(TickStats.PHASES)
+    assert all(seconds >= 0 for seconds in stats.timers.values())
+
+    stats.reset()
+    assert stats.as_dict()['wall_hits'] == 0
+
+
+@pytest.mark.parametrize('engine', BeeClust.TICK_ENGINES)
+def test_stats_bee_hit(engine):
+    simple_map = zeros8((1, 2))
+    simple_map[0, 0] = 2
+    simple_map[0, 1] = 4
+    b = BeeClust(simple_map, p_changedir=0, p_meet=0, stats=True, tick_engine=engine)
+    b.tick()
+    assert b.stats.bee_hits == 2
+    assert b.stats.waits == 0
+
+
+def test_stats_same_for_sequential_engines():
+    simple_map = random_map((20, 20), 3, waiting=False)
+
+    # the synchronous engine settles conflicts differently, so its counts differ
+    engines = [engine for engine in BeeClust.TICK_ENGINES if engine != 'synchronous']
+    counts = []
+    for engine in engines:
+        b = BeeClust(simple_map.copy(), p_changedir=0, p_wall=0, p_meet=0, stats=True, tick_engine=engine)
+        b.run(30)
+        counts.append({name: getattr(b.stats, name) for name in TickStats.COUNTERS})
+    for engine, count in zip(engines, counts):
+        assert count == counts[0], engine
+    assert counts[0]['wall_hits'] > 0 and counts[0]['bee_hits'] > 0
@@ -0,0 +1,84 @@
+import numpy
+
+from helpers import random_map, zeros8
+from beeclust import BeeClust
+from beeclust.store import BeeStore
+
+
+def test_store_from_map():
+    simple_map = numpy.array([[0, 3, 5], [-4, 0, 1]], dtype=numpy.int8)
+    store = BeeStore.from_map(simple_map)
+    assert len(store) == 3
+    assert store.x.tolist() == [0, 1, 1]
+    assert store.y.tolist() == [1, 0, 2]
+    assert store.heading.tolist() == [3, 0, 1]
+    assert store.wait.tolist() == [0, 4, 0]
+    assert store.values.tolist() == [3, -4, 1]
+
+
+def test_store_follows_ticks():
+    rng = numpy.random.RandomState(3)
+    for engine in BeeClust.TICK_ENGINES:
+        simple_map = random_map((7, 9), rng)
+        b = BeeClust(simple_map, tick_engine=engine)
+        for _ in range(20):
+            b.tick()
+            fresh = BeeStore.from_map(b.map)
+            assert (b._store.x == fresh.x).all()
+            assert (b._store.y == fresh.y).all()
+            assert (b._store.values == fresh.values).all()
+
+
+def test_set_cell_updates_bees():
+    b = BeeClust(zeros8((3, 3)))
+    b.set_cell(1, 1, 2)
+    b.set_cell(0, 2, -3)
+    assert b.bees == [(0, 2), (1, 1)]
+    b.clear_cell(1, 1)
+    assert b.bees == [(0, 2)]
+
+
+def test_direct_edit_is_picked_up():
+    b = BeeClust(zeros8((3, 3)))
+    b.map[2, 2] = 4
+    assert b.bees == [(2, 2)]
+    b.map[2][2] = 0
+    assert b.bees == []
+
+    simple_map = numpy.array([[2, 0, 0, 0]], dtype=numpy.int8)
+    b = BeeClust(simple_map)
+    b.map[0, 0] = 7
+    b.forget()
+    assert b.map[0, 0] == 7
+    assert b.bees == [] and b.score == 0.0
+    assert len(b.swarms) == 0
+
+
+def test_sync_bees_after_editing_given_array():
+    simple_map = zeros8((3, 3))
+    b = BeeClust(simple_map)
+    simple_map[2, 2] = 4
+    assert b.bees == []
+    b.sync_bees()
+    assert b.bees == [(2, 2)]
+
+
+def test_map_operations_give_plain_arrays():
+    b = BeeClust(zeros8((3, 3)))
+    b.map.copy()[0, 0] = 4
+    (b.map + 1)[0, 0] = 4
+    assert b.bees == []
+    b.map += 4
+    assert len(b.bees) == 9
+
+
+def test_tick_resyncs_after_direct_edit():
+    for engine in BeeClust.TICK_ENGINES:
+        simple_map = zeros8((1, 5))
+        simple_map[0, 0] = 4
+        b = BeeClust(simple_map, p_changedir=0, p_wall=0, tick_engine=engine)
+        b.map[0, 0] = 0
+        b.map[0, 2] = 2
+        b.tick()
+        assert b.bees == [(0, 3)]
+        assert numpy.count_nonzero(b.map) == 1
@@ -1,6 +1,7 @@
 import numpy
+import pytest
 
-from helpers import zeros8
+from helpers import random_map, zeros8
 from beeclust import BeeClust
 
 
@@ -70,3 +71,79 @@ def test_swarms_change_after_tick():
     assert len(b.swarms) == 1
     assert len(swt(b.swarms)[0]) == 1
     assert swt(b.swarms)[0][0] != (1, 0)
+
+
+def test_swarm_labels():
+    simple_map = numpy.array(
+        [
+            [1, 0, 5, -2],
+            [-1, 0, 0, 3],
+            [0, 0, 4, 0],
+        ], dtype=numpy.int8)
+
+    b = BeeClust(simple_map)
+    assert (b.swarm_labels == [[1, 0, 0, 2], [1, 0, 0, 2], [0, 0, 3, 0]]).all()
+
+
+def test_swarms_snake():
+    simple_map = zeros8((9, 5))
+    simple_map[::2, :] = 1
+    simple_map[1::4, -1] = 2
+    simple_map[3::4, 0] = 3
+    b = BeeClust(simple_map)
+    assert len(b.swarms) == 1
+    assert len(b.swarms[0]) == numpy.count_nonzero(simple_map)
+    assert b.swarm_labels.max() == 1
+
+
+def test_tracker_follows_ticks():
+    rng = numpy.random.RandomState(5)
+    for engine in BeeClust.TICK_ENGINES:
+        simple_map = random_map((8, 9), rng)
+        b = BeeClust(simple_map, p_meet=.5, tick_engine=engine)
+        tracker = b.track_swarms()
+        for _ in range(30):
+            b.tick()
+            assert tracker.count == len(b.swarms)
+            assert sorted(tracker.sizes) == sorted(len(s) for s in b.swarms)
+            for swarm in b.swarms:
+                assert len({tracker.labels[x, y] for x, y in swarm}) == 1
+
+
+def test_tracker_split_and_merge():
+    simple_map = zeros8((1, 5))
+    simple_map[0, :] = -5
+    b = BeeClust(simple_map)
+    tracker = b.track_swarms()
+    b.clear_cell(0, 2)
+    assert tracker.count == 2
+    assert sorted(tracker.sizes) == [2, 2]
+    b.set_cell(0, 2, -3)
+    assert tracker.count == 1
+    assert list(tracker.sizes) == [5]
+    tracker.detach()
+    b.clear_cell(0, 2)
+    assert tracker.count == 1
+
+
+def test_swarm_stats_match_swarms():
+    simple_map = random_map((15, 12), 4)
+    b = BeeClust(simple_map)
+
+    stats = b.swarm_stats
+    swarms = b.swarms
+    assert len(stats) == len(swarms)
+    for record, swarm in zip(stats, swarms):
+        xs, ys = numpy.array(swarm).T
+        assert record['size'] == len(swarm)
+        assert record['centroid_x'] == pytest.approx(xs.mean())
+        assert record['centroid_y'] == pytest.approx(ys.mean())
+        assert (record['min_x'], record['max_x']) == (xs.min(), xs.max())
+        assert (record['min_y'], record['max_y']) == (ys.min(), ys.max())
+        assert record['mean_temperature'] == pytest.approx(numpy.mean([b.heatmap[bee] for bee in swarm]))
+
+
+def test_swarm_stats_empty():
+    stats = BeeClust(zeros8((3, 3))).swarm_stats
+    assert stats.size == 0
+    assert 'mean_temperature' in stats.dtype.names
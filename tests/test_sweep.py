@@ -0,0 +1,40 @@
+import numpy
+import pytest
+
+from helpers import zeros8
+from beeclust.sweep import parameter_grid, sweep
+
+
+def test_parameter_grid():
+    grid = list(parameter_grid({'p_wall': [0, 1], 'T_heater': [40, 50, 60]}))
+    assert len(grid) == 6
+    assert {'T_heater': 50, 'p_wall': 1} in grid
+    with pytest.raises(ValueError):
+        list(parameter_grid({'speed': [1]}))
+
+
+def test_sweep_runs_every_combination():
+    simple_map = zeros8((5, 6))
+    simple_map[0, 0] = 6
+    simple_map[-1, -1] = 7
+    simple_map[2, 1:5] = 1
+    grid = {'p_changedir': [0, .5], 'T_heater': [40, 60]}
+
+    results = dict(sweep(simple_map, grid, ticks=5, replicas=3, processes=2))
+
+    assert sorted(results) == [0, 1, 2, 3]
+    for index, params in enumerate(parameter_grid(grid)):
+        result = results[index]
+        assert result.params == params
+        assert result.score.shape == result.swarms.shape == result.moved.shape == (3,)
+        assert (result.swarms >= 1).all()
+    assert (simple_map[2, 1:5] == 1).all()
+
+
+def test_sweep_same_as_local_run():
+    simple_map = numpy.array([[0, 0, 0, 2, 0, 6]], dtype=numpy.int8)
+    grid = {'p_changedir': [0], 'p_wall': [1], 'T_heater': [40, 100]}
+    results = dict(sweep(simple_map, grid, ticks=2, replicas=2, processes=1))
+    # bee reaches the heater and waits there, the hotter the longer it stays warm
+    assert list(results[0].moved) == [1, 1]
+    assert results[1].score[0] > results[0].score[0] > 22
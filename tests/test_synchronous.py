@@ -0,0 +1,41 @@
+import numpy
+
+from helpers import random_map, zeros8
+from beeclust import BeeClust
+from beeclust.store import is_bee
+
+
+def test_vacated_cell_is_not_followed():
+    simple_map = zeros8((1, 3))
+    simple_map[0, 1:] = 4
+    b = BeeClust(simple_map.copy(), p_changedir=0, p_meet=0, tick_engine='synchronous')
+    assert b.tick() == 1
+    assert list(b.map[0]) == [4, 0, 4]
+
+    python = BeeClust(simple_map, p_changedir=0, p_meet=0)
+    assert python.tick() == 2
+
+
+def test_random_winner():
+    winners = set()
+    for seed in range(20):
+        simple_map = zeros8((3, 3))
+        simple_map[0, 1] = 3
+        simple_map[2, 1] = 1
+        b = BeeClust(simple_map, p_changedir=0, p_meet=0, tick_engine='synchronous', seed=seed)
+        assert b.tick() == 1
+        assert b.map[1, 1] in (1, 3)
+        winners.add(int(b.map[1, 1]))
+    assert winners == {1, 3}
+
+
+def test_bees_are_kept():
+    simple_map = random_map((25, 25))
+    bees = numpy.count_nonzero(is_bee(simple_map))
+
+    for layout in BeeClust.LAYOUTS:
+        b = BeeClust(simple_map.copy(), tick_engine='synchronous', layout=layout, seed=1)
+        for _ in range(30):
+            b.tick()
+            assert numpy.count_nonzero(is_bee(b.map)) == bees
+        assert b.bees == list(zip(*numpy.nonzero(is_bee(b.map))))
@@ -0,0 +1,63 @@
+import functools
+import pytest
+
+from helpers import random_map, zeros8
+import test_tick
+from test_tick import *  # noqa: F401,F403 -- rerun the tick tests on this engine
+from beeclust import BeeClust
+
+
+@pytest.fixture(autouse=True)
+def scheduled(monkeypatch):
+    monkeypatch.setattr(test_tick, 'BeeClust',
+                        functools.partial(BeeClust, tick_engine='scheduled'))
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_matches_python_engine(seed):
+    simple_map = random_map((12, 15), seed)
+
+    python = BeeClust(simple_map.copy(), k_stay=20, seed=seed, stats=True)
+    scheduled = BeeClust(simple_map.copy(), k_stay=20, seed=seed, stats=True, tick_engine='scheduled')
+    for _ in range(40):
+        assert python.tick() == scheduled.tick()
+        assert (python.map == scheduled.map).all()
+    assert python.bees == scheduled.bees
+    assert python.stats.as_dict()['wait_ticks'] == scheduled.stats.as_dict()['wait_ticks']
+    assert python.stats.waits == scheduled.stats.waits
+
+
+def test_tick_touches_only_moving_and_waking_bees(monkeypatch):
+    simple_map = zeros8((20, 20))
+    simple_map[::2, ::2] = -50
+    simple_map[1, 1] = 2
+    b = BeeClust(simple_map, p_changedir=0, p_wall=0, tick_engine='scheduled')
+    b.tick()
+
+    steps, flushes = [], []
+    step_bee, flush = BeeClust._step_bee, BeeClust._flush_schedule
+    monkeypatch.setattr(BeeClust, '_step_bee', lambda self, *args: steps.append(1) or step_bee(self, *args))
+    monkeypatch.setattr(BeeClust, '_flush_schedule', lambda self: flushes.append(1) or flush(self))
+    b.run(30)
+    assert len(steps) == 30
+    assert flushes == []
+    monkeypatch.undo()
+
+    assert b.map[0, 0] == -50 + 31
+    assert len(b.bees) == 101
+
+
+def test_edits_between_ticks_match_python_engine():
+    simple_map = random_map((12, 15), 6)
+    python = BeeClust(simple_map.copy(), k_stay=20, seed=3)
+    scheduled = BeeClust(simple_map.copy(), k_stay=20, seed=3, tick_engine='scheduled')
+    for b in python, scheduled:
+        b.run(15)
+        b.set_cell(5, 5, 3)
+        b.run(5)
+        b.map[6, 6] = -4
+        b.run(5)
+        b.forget()
+        b.run(15)
+    assert (python.map == scheduled.map).all()
+    assert python.bees == scheduled.bees
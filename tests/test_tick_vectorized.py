@@ -0,0 +1,43 @@
+import functools
+import numpy
+import pytest
+
+from helpers import random_map
+import test_tick
+from test_tick import *  # noqa: F401,F403 -- rerun the tick tests on this engine
+from beeclust import BeeClust
+
+
+@pytest.fixture(autouse=True)
+def vectorized(monkeypatch):
+    monkeypatch.setattr(test_tick, 'BeeClust',
+                        functools.partial(BeeClust, tick_engine='vectorized'))
+
+
+def test_matches_python_engine_deterministic():
+    rng = numpy.random.RandomState(1)
+    for _ in range(100):
+        simple_map = random_map(tuple(rng.randint(1, 9, size=2)), rng, waiting=False)
+        kwargs = dict(p_changedir=0, p_wall=0, p_meet=0)
+        slow = BeeClust(simple_map.copy(), **kwargs)
+        fast = BeeClust(simple_map.copy(), tick_engine='vectorized', **kwargs)
+        for _ in range(10):
+            assert slow.tick() == fast.tick()
+            assert (slow.map == fast.map).all()
+
+
+def test_matches_python_engine_waiting():
+    rng = numpy.random.RandomState(2)
+    for p_wall, p_meet in (0, 1), (1, 0), (1, 1):
+        for _ in range(50):
+            simple_map = random_map(tuple(rng.randint(1, 9, size=2)), rng)
+            kwargs = dict(p_changedir=0, p_wall=p_wall, p_meet=p_meet)
+            slow = BeeClust(simple_map.copy(), **kwargs)
+            fast = BeeClust(simple_map.copy(), tick_engine='vectorized', **kwargs)
+            assert slow.tick() == fast.tick()
+            assert (slow.map == fast.map).all()
+
+
+def test_unknown_engine():
+    with pytest.raises(ValueError):
+        BeeClust(numpy.zeros((2, 2), dtype=numpy.int8), tick_engine='warp')
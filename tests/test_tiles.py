@@ -0,0 +1,78 @@
+import numpy
+import pytest
+
+from helpers import random_map, zeros8
+from beeclust import BeeClust
+from beeclust.heatmap import HeatMap, row_bands
+from beeclust.store import is_bee
+
+
+def test_row_bands():
+    assert row_bands(10, 4) == [(0, 4), (4, 8), (8, 10)]
+    assert row_bands(9, 4) == [(0, 4), (4, 9)]
+    assert row_bands(3, 4) == [(0, 3)]
+    assert row_bands(0, 4) == []
+
+
+@pytest.mark.parametrize('tile_rows', [2, 3, 7, 100])
+def test_tiled_heatmap_same_as_multisource(tile_rows):
+    simple_map = random_map((31, 17), 0, devices=2)
+    simple_map[10, :16] = 5
+    simple_map[20, 1:] = 5
+
+    expected = HeatMap(simple_map, 40, 5, 22, .9)
+    tiled = HeatMap(simple_map, 40, 5, 22, .9, engine='tiled', tile_rows=tile_rows, workers=3)
+    assert numpy.array_equal(tiled.dist_heater, expected.dist_heater)
+    assert numpy.array_equal(tiled.dist_cooler, expected.dist_cooler)
+    assert numpy.allclose(tiled.heatmap, expected.heatmap, equal_nan=True)
+
+
+def test_tiled_heatmap_validation():
+    with pytest.raises(TypeError):
+        HeatMap(zeros8((4, 4)), 40, 5, 22, .9, engine='tiled', tile_rows=2.5)
+    with pytest.raises(ValueError):
+        HeatMap(zeros8((4, 4)), 40, 5, 22, .9, engine='tiled', tile_rows=1)
+    with pytest.raises(ValueError):
+        BeeClust(zeros8((4, 4)), tick_engine='tiled', tile_rows=1)
+
+
+def test_single_tile_same_as_vectorized():
+    simple_map = random_map((20, 20), 1, devices=2)
+    vectorized = BeeClust(simple_map.copy(), tick_engine='vectorized', seed=5)
+    tiled = BeeClust(simple_map.copy(), tick_engine='tiled', seed=5)
+    assert list(vectorized.run(20)) == list(tiled.run(20))
+    assert numpy.array_equal(vectorized.map, tiled.map)
+
+
+def test_tiles_do_not_depend_on_workers():
+    simple_map = random_map((40, 30), 2, devices=2)
+    maps = []
+    for workers in (1, 4):
+        with BeeClust(simple_map.copy(), tick_engine='tiled', tile_rows=3, workers=workers, seed=7) as b:
+            b.run(25)
+        maps.append(b.map)
+        assert numpy.count_nonzero(is_bee(b.map)) == numpy.count_nonzero(is_bee(simple_map))
+        assert b.bees == list(zip(*numpy.nonzero(is_bee(b.map))))
+    assert numpy.array_equal(maps[0], maps[1])
+
+
+def test_close_shuts_down_thread_pool():
+    b = BeeClust(random_map((10, 10), 3), tick_engine='tiled', tile_rows=4, seed=1)
+    b.tick()
+    executor = b._executor
+    b.close()
+    assert b._executor is None
+    with pytest.raises(RuntimeError):
+        executor.submit(int)
+    b.tick()
+    b.close()
+
+
+def test_even_tile_wins_border():
+    simple_map = zeros8((6, 3))
+    simple_map[3, 1] = 3
+    simple_map[5, 1] = 1
+    b = BeeClust(simple_map, p_changedir=0, p_meet=0, tick_engine='tiled', tile_rows=2)
+    assert b.tick() == 1
+    assert b.map[4, 1] == 1
+    assert b.map[3, 1] == 3
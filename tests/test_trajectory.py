@@ -0,0 +1,49 @@
+import numpy
+import pytest
+
+from helpers import random_map, zeros8
+from beeclust import BeeClust
+from beeclust.trajectory import TrajectoryReader, TrajectoryWriter
+
+
+def test_replay_any_tick(tmp_path):
+    path = str(tmp_path / 'run.bct')
+    for engine in BeeClust.TICK_ENGINES:
+        b = BeeClust(random_map((9, 11), 1), tick_engine=engine)
+        states = [b.map.copy()]
+        with TrajectoryWriter(path, b, keyframe_every=7) as writer:
+            for _ in range(30):
+                b.tick()
+                states.append(b.map.copy())
+            assert writer.ticks == 31
+
+        reader = TrajectoryReader(path)
+        assert len(reader) == 31
+        assert reader.shape == b.map.shape
+        assert reader.dtype == b.map.dtype
+        for tick in 30, 0, 15, 7, 13, 14, -1:
+            assert (reader[tick] == states[tick]).all()
+        with pytest.raises(IndexError):
+            reader[31]
+
+
+def test_deltas_hold_changed_cells_only(tmp_path):
+    path = str(tmp_path / 'run.bct')
+    b = BeeClust(numpy.array([[0, 2, 0, 0, -5, 5]], dtype=numpy.int8),
+                 p_changedir=0)
+    with TrajectoryWriter(path, b, keyframe_every=100):
+        b.tick()
+        b.set_cell(0, 0, 6)
+        b.tick()
+
+    reader = TrajectoryReader(path)
+    cells, values = reader.delta(1)
+    assert sorted(zip(cells.tolist(), values.tolist())) == [(1, 0), (2, 2), (4, -4)]
+    assert (reader[2] == [[6, 0, 0, 2, -3, 5]]).all()
+
+
+def test_unclosed_trajectory(tmp_path):
+    path = str(tmp_path / 'run.bct')
+    TrajectoryWriter(path, BeeClust(zeros8((2, 2))))._file.flush()
+    with pytest.raises(ValueError):
+        TrajectoryReader(path)
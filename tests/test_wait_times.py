@@ -0,0 +1,54 @@
+import numpy
+
+from helpers import zeros8
+from beeclust import BeeClust
+
+
+def expected_wait_times(b):
+    expected = numpy.zeros(b.shape, dtype=int)
+    for x in range(b.shape[0]):
+        for y in range(b.shape[1]):
+            T_local = b.heatmap[x, y]
+            if not numpy.isnan(T_local):
+                expected[x, y] = max(int(b.k_stay / (1 + abs(b.T_ideal - T_local))), b.min_wait)
+    walls = numpy.isnan(b.heatmap)
+    return numpy.where(walls, b.min_wait, expected)
+
+
+def arena():
+    simple_map = zeros8((6, 7))
+    simple_map[0, 0] = 6
+    simple_map[5, 6] = 7
+    simple_map[2, 1:5] = 5
+    return simple_map
+
+
+def test_wait_times_match_formula():
+    b = BeeClust(arena(), k_stay=60, T_ideal=30)
+    assert numpy.array_equal(b.wait_times, expected_wait_times(b))
+    assert b.wait((3, 3)) == -b.wait_times[3, 3]
+
+
+def test_wait_times_follow_parameters():
+    b = BeeClust(arena())
+    table = b.wait_times
+    assert b.wait_times is table
+
+    b.k_stay = 200
+    assert numpy.array_equal(b.wait_times, expected_wait_times(b))
+
+    b.set_temperatures(T_heater=60)
+    assert numpy.array_equal(b.wait_times, expected_wait_times(b))
+
+    b.T_ideal, b.min_wait = 25, 7
+    b.recalculate_heat()
+    assert numpy.array_equal(b.wait_times, expected_wait_times(b))
+
+
+def test_wait_times_after_set_cell():
+    b = BeeClust(arena())
+    b.wait_times
+    b.set_cell(4, 3, 6)
+    b.clear_cell(2, 2)
+    b.set_cell(0, 0, 1)
+    assert numpy.array_equal(b.wait_times, expected_wait_times(b))